@@ -7,3 +7,4 @@ class AppConfig(DjangoAppConfig):
     def ready(self) -> None:
         from .events import publish
         from . import signals
+        from .auth import graph, revocation
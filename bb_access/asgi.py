@@ -9,10 +9,12 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 
 import os
 
+from anyio import to_thread
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 from fastapi import FastAPI, Response
 from starlette.exceptions import HTTPException
-from starlette.responses import HTMLResponse, JSONResponse
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from starlette.routing import Route
 from fastapi.encoders import jsonable_encoder
 from asyncapi_docgen.docs import get_asyncapi_ui_html
@@ -36,7 +38,9 @@ from djfapi.handlers.error import (
 )
 from djfapi.middleware.sentry import SentryAsgiMiddleware
 from djfapi.utils.health_check import get_health, Health
-from . import routers
+from .auth.signing import get_signer, PooledSigner
+from .events.broadcast import BroadcastListener
+from . import metrics, routers
 
 
 def asyncapi_html(request):
@@ -59,15 +63,52 @@ app = FastAPI(
 )
 
 
+@app.on_event("startup")
+async def set_sync_endpoint_threads():
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.SYNC_ENDPOINT_THREADS
+    )
+
+
+@app.on_event("startup")
+def start_broadcast_listener():
+    if settings.BROKER_URL and (
+        settings.ACCESS_GRAPH_CACHE_ENABLED
+        or settings.USER_TOKEN_REVOCATION_FILTER_ENABLED
+    ):
+        BroadcastListener().start()
+
+
+@app.on_event("startup")
+def load_signer():
+    if settings.JWT_PRIVATE_KEY:
+        get_signer()
+
+
+@app.on_event("shutdown")
+def shutdown_signer():
+    if settings.JWT_PRIVATE_KEY and isinstance(get_signer(), PooledSigner):
+        get_signer().shutdown()
+
+
 @app.get("/", response_model=Health)
 async def healthcheck(response: Response):
     return get_health(response)
 
 
+@app.get("/access/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return metrics.render()
+
+
 app.include_router(routers.auth.router, prefix="/access/auth", tags=["auth"])
 app.include_router(routers.users.router, prefix="/access/users", tags=["users"])
 app.include_router(routers.roles.router, prefix="/access/roles", tags=["roles"])
+app.include_router(routers.scopes.router, prefix="/access/scopes", tags=["scopes"])
 app.include_router(routers.tenants.router, prefix="/access/tenants", tags=["tenants"])
+app.include_router(
+    routers.well_known.router, prefix="/access/.well-known", tags=["well-known"]
+)
 
 app.add_middleware(SentryAsgiMiddleware)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
@@ -1,31 +1,71 @@
 from typing import Optional
 
+from django.db.models import Q
 from django.utils import timezone
-from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.backends import BaseBackend, ModelBackend
 from djdantic.schemas import Error
 from djfapi.exceptions import ValidationError
 
 from bb_access.models import User, UserOTP
 
 
+class UserBackend(ModelBackend):
+    """
+    `ModelBackend` which checks the password of an already loaded `user`
+    instead of fetching it again, and the service credential of `SERVICE` users.
+    """
+
+    def authenticate(
+        self,
+        request,
+        password: Optional[str] = None,
+        user: Optional[User] = None,
+        **kwargs
+    ) -> Optional[User]:
+        if user is None:
+            return super().authenticate(request, password=password, **kwargs)
+
+        if user.has_service_credential and (password or "").startswith(
+            User.SERVICE_CREDENTIAL_PREFIX
+        ):
+            is_authenticated = user.check_service_credential(password)
+            if is_authenticated:
+                user._login_via = User.LoginMethod.SERVICE_CREDENTIAL
+
+        else:
+            is_authenticated = user.check_password(password)
+
+        if is_authenticated and self.user_can_authenticate(user):
+            return user
+
+
 class UserOTPBackend(BaseBackend):
     def authenticate(
-        self, request, password: Optional[str] = None, **kwargs
+        self,
+        request,
+        password: Optional[str] = None,
+        user: Optional[User] = None,
+        **kwargs
     ) -> Optional[User]:
         otp: UserOTP
+        if password is None:
+            return None
+
         try:
-            user = User.objects.get(**kwargs)
+            user = user or User.objects.get(**kwargs)
 
         except User.DoesNotExist:
             return None
 
         else:
-            otps = user.otps.filter(expire_at__gte=timezone.now(), used_at__isnull=True)
+            otps = user.otps.filter(
+                Q(lookup=UserOTP.get_lookup(user.id, password))
+                | Q(lookup__isnull=True),
+                expire_at__gte=timezone.now(),
+                used_at__isnull=True,
+            )
             for otp in otps:
-                if otp.type == UserOTP.UserOTPType.PIN and check_password(
-                    password, otp.value
-                ):
+                if otp.type == UserOTP.UserOTPType.PIN and otp.validate(password):
                     otp.used_at = timezone.now()
                     otp.save(
                         update_fields=[
@@ -36,9 +76,7 @@ class UserOTPBackend(BaseBackend):
                     user._login_via = User.LoginMethod.OTP_PIN
                     return user
 
-                elif otp.type == UserOTP.UserOTPType.TOKEN and check_password(
-                    password, otp.value
-                ):
+                elif otp.type == UserOTP.UserOTPType.TOKEN and otp.validate(password):
                     raise ValidationError(
                         detail=Error(
                             code="cannot_login_using_otp_type_token",
@@ -0,0 +1,29 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from typing import Iterable, Iterator
+
+
+def to_bits(indexes: Iterable[int]) -> int:
+    bits = 0
+    for index in indexes:
+        bits |= 1 << index
+
+    return bits
+
+
+def iter_indexes(bits: int) -> Iterator[int]:
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def encode_bits(bits: int) -> str:
+    return (
+        urlsafe_b64encode(bits.to_bytes((bits.bit_length() + 7) // 8, "little"))
+        .rstrip(b"=")
+        .decode("ascii")
+    )
+
+
+def decode_bits(value: str) -> int:
+    return int.from_bytes(urlsafe_b64decode(value + "=" * (-len(value) % 4)), "little")
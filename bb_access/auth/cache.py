@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+from time import time
+from typing import Any, Hashable, Optional, Tuple
+
+from bb_access.metrics import Counter
+
+
+class ExpiringLRUCache:
+    """
+    Thread safe LRU of at most `size` values, each dropped at its expiry time.
+    Lookups are counted by result in `requests`.
+    """
+
+    def __init__(self, size: int, requests: Counter):
+        self.size = size
+        self.requests = requests
+        self._lock = threading.Lock()
+        self._values: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, min_lifetime: float = 0) -> Optional[Any]:
+        with self._lock:
+            try:
+                value, expire_at = self._values[key]
+
+            except KeyError:
+                self.requests.inc(result="miss")
+                return None
+
+            if expire_at - time() <= min_lifetime:
+                del self._values[key]
+                self.requests.inc(result="expired")
+                return None
+
+            self._values.move_to_end(key)
+
+        self.requests.inc(result="hit")
+        return value
+
+    def set(self, key: Hashable, value: Any, expire_at: float):
+        if self.size <= 0:
+            return
+
+        with self._lock:
+            self._values[key] = (value, expire_at)
+            self._values.move_to_end(key)
+            while len(self._values) > self.size:
+                self._values.popitem(last=False)
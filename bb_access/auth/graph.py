@@ -0,0 +1,165 @@
+import logging
+import threading
+from collections import defaultdict
+from time import monotonic
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from bb_access.auth.bitset import to_bits
+from bb_access.models import (
+    AccessGeneration,
+    Role,
+    Scope,
+    access_generation_changed,
+)
+
+
+_logger = logging.getLogger(__name__)
+
+
+class AccessGraph:
+    """
+    Immutable snapshot of all roles and scopes of one `AccessGeneration`.
+    Scope sets are bitsets over `Scope.index`.
+    """
+
+    def __init__(
+        self,
+        *,
+        generation: int,
+        roles: Dict[str, Role],
+        scopes: Dict[int, Scope],
+        included_role_ids: Dict[str, List[str]],
+        scope_bits: Dict[str, int],
+    ):
+        self.generation = generation
+        self.roles = roles
+        self.default_role: Optional[Role] = next(
+            (role for role in roles.values() if role.is_default), None
+        )
+        self.scopes = scopes
+        self.codes: Dict[int, str] = {
+            index: scope.code for index, scope in scopes.items()
+        }
+        self.critical_scope_bits = to_bits(
+            index for index, scope in scopes.items() if scope.is_critical
+        )
+        self._role_ids: Dict[str, List[str]] = {}
+        self._scope_bits: Dict[str, int] = {}
+
+        def walk(role_id: str, visited: Dict[str, None]):
+            visited[role_id] = None
+            for included_role_id in included_role_ids[role_id]:
+                if included_role_id not in visited:
+                    walk(included_role_id, visited)
+
+            return visited
+
+        for role_id in roles:
+            visited_role_ids = walk(role_id, {})
+            self._role_ids[role_id] = list(visited_role_ids)
+            self._scope_bits[role_id] = 0
+            for visited_role_id in visited_role_ids:
+                self._scope_bits[role_id] |= scope_bits[visited_role_id]
+
+    @classmethod
+    def load(cls) -> "AccessGraph":
+        generation = AccessGeneration.get_current()
+
+        included_role_ids: Dict[str, List[str]] = defaultdict(list)
+        for from_role_id, to_role_id in Role.included_roles.through.objects.order_by(
+            "to_role_id"
+        ).values_list("from_role_id", "to_role_id"):
+            included_role_ids[from_role_id].append(to_role_id)
+
+        scopes = {
+            scope.index: scope
+            for scope in Scope.objects.filter(is_active=True, is_internal=False)
+        }
+
+        scope_bits: Dict[str, int] = defaultdict(int)
+        for role_id, scope_index in Role.scopes.through.objects.filter(
+            scope__is_active=True, scope__is_internal=False
+        ).values_list("role_id", "scope__index"):
+            scope_bits[role_id] |= 1 << scope_index
+
+        return cls(
+            generation=generation,
+            roles={role.id: role for role in Role.objects.all()},
+            scopes=scopes,
+            included_role_ids=included_role_ids,
+            scope_bits=scope_bits,
+        )
+
+    def get_roles(self, role: Role) -> List[Role]:
+        return [self.roles[role_id] for role_id in self._role_ids[role.id]]
+
+    def get_scope_bits(self, role: Role) -> int:
+        return self._scope_bits[role.id]
+
+
+_lock = threading.Lock()
+_graph: Optional[AccessGraph] = None
+_checked_at: float = 0.0
+_is_stale: bool = True
+
+
+def get_cached_graph() -> Optional[AccessGraph]:
+    """
+    Get the cached graph if it can be used without querying the database,
+    otherwise `None`.
+    """
+    graph = _graph
+    if (
+        graph
+        and not _is_stale
+        and monotonic() - _checked_at < settings.ACCESS_GRAPH_CACHE_CHECK_INTERVAL
+    ):
+        return graph
+
+    return None
+
+
+def get_graph() -> AccessGraph:
+    """
+    Get the cached graph. The generation stored in the database is checked at
+    most every `ACCESS_GRAPH_CACHE_CHECK_INTERVAL` seconds, changes within this
+    process and broadcasted changes of other processes mark the graph as stale
+    immediately.
+    """
+    global _graph, _checked_at, _is_stale
+
+    graph = get_cached_graph()
+    if graph:
+        return graph
+
+    graph = _graph
+    with _lock:
+        if _graph is not graph and not _is_stale:
+            return _graph
+
+        _is_stale = False
+        _checked_at = monotonic()
+        if not graph or graph.generation != AccessGeneration.get_current():
+            graph = AccessGraph.load()
+            _logger.info("Loaded access graph generation %i", graph.generation)
+
+        _graph = graph
+
+    return graph
+
+
+def invalidate(generation: Optional[int] = None):
+    global _is_stale
+
+    if generation is not None and _graph and _graph.generation >= generation:
+        return
+
+    _is_stale = True
+
+
+@receiver(access_generation_changed)
+def access_generation_changed_receiver(sender, generation: int, **kwargs):
+    invalidate(generation)
@@ -0,0 +1,164 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password as django_check_password,
+    make_password as django_make_password,
+)
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+from djdantic.schemas import Error
+from fastapi.exceptions import HTTPException
+
+from bb_access.metrics import Counter, Summary
+
+
+KEYED_DIGEST_ALGORITHM = "hmac_sha256"
+
+hashing_queue_wait = Summary(
+    "access_hashing_queue_wait_seconds",
+    "Time password and OTP hash checks wait for a hashing worker",
+)
+hashing_rejected = Counter(
+    "access_hashing_rejected_total",
+    "Password and OTP hash checks rejected because the hashing queue is full",
+)
+
+
+class HashingCapacityError(HTTPException):
+    def __init__(
+        self,
+        status_code: int = 503,
+        detail: Any = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class HashingPool:
+    """
+    Runs hash checks on `HASHING_POOL_WORKERS` dedicated threads. At most
+    `HASHING_POOL_QUEUE_SIZE` checks wait for a worker, further checks are
+    rejected right away. The endpoint thread of an admitted check is blocked
+    until it is done, so `max_admitted` keeps login bursts from occupying the
+    threads of all other endpoints.
+    """
+
+    def __init__(
+        self, workers: int, queue_size: int, max_admitted: Optional[int] = None
+    ):
+        admitted = workers + queue_size
+        if max_admitted is not None:
+            admitted = min(admitted, max_admitted)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(workers, admitted), thread_name_prefix="hashing"
+        )
+        self._slots = threading.BoundedSemaphore(admitted)
+
+    def run(self, func: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            hashing_rejected.inc()
+            raise HashingCapacityError(
+                detail=Error(code="hashing_capacity_exceeded"),
+                headers={"Retry-After": "1"},
+            )
+
+        submitted_at = perf_counter()
+
+        def call():
+            hashing_queue_wait.observe(perf_counter() - submitted_at)
+            return func(*args)
+
+        try:
+            return self._executor.submit(call).result()
+
+        finally:
+            self._slots.release()
+
+
+@lru_cache(maxsize=None)
+def get_hashing_pool() -> HashingPool:
+    return HashingPool(
+        settings.HASHING_POOL_WORKERS,
+        settings.HASHING_POOL_QUEUE_SIZE,
+        max_admitted=max(
+            1,
+            int(
+                settings.SYNC_ENDPOINT_THREADS * settings.HASHING_POOL_MAX_THREAD_SHARE
+            ),
+        ),
+    )
+
+
+def check_password(
+    password: Optional[str],
+    encoded: str,
+    setter: Optional[Callable[[str], None]] = None,
+) -> bool:
+    """
+    `django.contrib.auth.hashers.check_password` running in the hashing pool.
+    The `setter` upgrading the stored hash is called in the calling thread.
+    """
+    if not settings.HASHING_POOL_WORKERS:
+        return django_check_password(password, encoded, setter)
+
+    updated_passwords: List[str] = []
+    is_correct = get_hashing_pool().run(
+        django_check_password,
+        password,
+        encoded,
+        updated_passwords.append if setter else None,
+    )
+    for updated_password in updated_passwords:
+        setter(updated_password)
+
+    return is_correct
+
+
+def make_password(password: Optional[str]) -> str:
+    """
+    `django.contrib.auth.hashers.make_password` running in the hashing pool.
+    """
+    if not settings.HASHING_POOL_WORKERS:
+        return django_make_password(password)
+
+    return get_hashing_pool().run(django_make_password, password)
+
+
+def _get_keyed_digest(value: str, *, key_salt: str, salt: str) -> str:
+    return salted_hmac(f"{key_salt}:{salt}", value, algorithm="sha256").hexdigest()
+
+
+def make_keyed_digest(value: str, *, key_salt: str) -> str:
+    """
+    HMAC-SHA256 of `value` keyed with `SECRET_KEY` and a random salt. Only for
+    random secrets of sufficient entropy, which need no deliberately slow hash.
+    """
+    salt = get_random_string(16)
+    return "$".join(
+        (
+            KEYED_DIGEST_ALGORITHM,
+            salt,
+            _get_keyed_digest(value, key_salt=key_salt, salt=salt),
+        )
+    )
+
+
+def is_keyed_digest(encoded: Optional[str]) -> bool:
+    return bool(encoded) and encoded.startswith(f"{KEYED_DIGEST_ALGORITHM}$")
+
+
+def check_keyed_digest(
+    value: Optional[str], encoded: Optional[str], *, key_salt: str
+) -> bool:
+    if value is None or not is_keyed_digest(encoded):
+        return False
+
+    _, salt, digest = encoded.split("$", 2)
+    return constant_time_compare(
+        digest, _get_keyed_digest(value, key_salt=key_salt, salt=salt)
+    )
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jose.utils import base64url_encode
+
+
+PublicKey = Union[ec.EllipticCurvePublicKey, ed25519.Ed25519PublicKey]
+PrivateKey = Union[ec.EllipticCurvePrivateKey, ed25519.Ed25519PrivateKey]
+
+
+ALGORITHM_EDDSA = "EdDSA"
+EC_ALGORITHMS = {
+    "ES256": (ec.SECP256R1, hashes.SHA256),
+    "ES384": (ec.SECP384R1, hashes.SHA384),
+    "ES512": (ec.SECP521R1, hashes.SHA512),
+}
+EC_CURVE_NAMES = {
+    ec.SECP256R1: "P-256",
+    ec.SECP384R1: "P-384",
+    ec.SECP521R1: "P-521",
+}
+
+_PEM_PATTERN = re.compile(
+    r"-----BEGIN [A-Z ]+-----.+?-----END [A-Z ]+-----", flags=re.DOTALL
+)
+
+
+def get_algorithm(key: Union[PublicKey, PrivateKey]) -> str:
+    if isinstance(key, (ed25519.Ed25519PublicKey, ed25519.Ed25519PrivateKey)):
+        return ALGORITHM_EDDSA
+
+    if isinstance(key, (ec.EllipticCurvePublicKey, ec.EllipticCurvePrivateKey)):
+        for algorithm, (curve, _) in EC_ALGORITHMS.items():
+            if isinstance(key.curve, curve):
+                return algorithm
+
+    raise ImproperlyConfigured(f"Unsupported JWT key type {type(key).__name__}")
+
+
+def load_private_key(private_key: str, algorithm: str) -> PrivateKey:
+    key = serialization.load_pem_private_key(private_key.encode(), password=None)
+    if get_algorithm(key) != algorithm:
+        raise ImproperlyConfigured(
+            f"JWT_PRIVATE_KEY is a {get_algorithm(key)} key, "
+            f"JWT_ALGORITHM is {algorithm}"
+        )
+
+    return key
+
+
+def _b64(value: bytes) -> str:
+    return base64url_encode(value).decode()
+
+
+class VerificationKey:
+    def __init__(self, public_key: PublicKey):
+        self.public_key = public_key
+        self.algorithm = get_algorithm(public_key)
+        self.jwk = self._get_jwk()
+        self.kid = get_key_id(self.jwk)
+
+    def _get_jwk(self) -> Dict[str, str]:
+        if self.algorithm == ALGORITHM_EDDSA:
+            return {
+                "kty": "OKP",
+                "crv": "Ed25519",
+                "x": _b64(
+                    self.public_key.public_bytes(
+                        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+                    )
+                ),
+            }
+
+        size = (self.public_key.curve.key_size + 7) // 8
+        numbers = self.public_key.public_numbers()
+        return {
+            "kty": "EC",
+            "crv": EC_CURVE_NAMES[type(self.public_key.curve)],
+            "x": _b64(numbers.x.to_bytes(size, "big")),
+            "y": _b64(numbers.y.to_bytes(size, "big")),
+        }
+
+    def to_jwk(self) -> Dict[str, str]:
+        return {**self.jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        try:
+            if self.algorithm == ALGORITHM_EDDSA:
+                self.public_key.verify(signature, signing_input)
+
+            else:
+                size = (self.public_key.curve.key_size + 7) // 8
+                if len(signature) != 2 * size:
+                    return False
+
+                self.public_key.verify(
+                    encode_dss_signature(
+                        int.from_bytes(signature[:size], "big"),
+                        int.from_bytes(signature[size:], "big"),
+                    ),
+                    signing_input,
+                    ec.ECDSA(EC_ALGORITHMS[self.algorithm][1]()),
+                )
+
+        except InvalidSignature:
+            return False
+
+        return True
+
+
+def get_key_id(jwk: Dict[str, str]) -> str:
+    """
+    JWK thumbprint (RFC 7638) of the public key, so the `kid` is derived from the
+    key itself and equal in every process.
+    """
+    return _b64(
+        hashlib.sha256(
+            json.dumps(jwk, separators=(",", ":"), sort_keys=True).encode()
+        ).digest()
+    )
+
+
+def load_public_keys(pem_bundle: str) -> List[PublicKey]:
+    return [
+        serialization.load_pem_public_key(pem.encode())
+        for pem in _PEM_PATTERN.findall(pem_bundle or "")
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_verification_keys() -> Dict[str, VerificationKey]:
+    """
+    Keys accepted for tokens by `kid`: `JWT_PUBLIC_KEY` of the current signing
+    key and all keys of `JWT_VERIFICATION_KEYS`, which keeps tokens of the
+    previous key valid (or accepts tokens of the next key) during a rotation.
+    """
+    keys: Dict[str, VerificationKey] = {}
+    for public_key in load_public_keys(
+        "\n".join((settings.JWT_PUBLIC_KEY or "", settings.JWT_VERIFICATION_KEYS))
+    ):
+        key = VerificationKey(public_key)
+        keys[key.kid] = key
+
+    return keys
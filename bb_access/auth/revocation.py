@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import math
+import threading
+from time import monotonic
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils import timezone
+
+from bb_access.metrics import Counter
+from bb_access.models import User, UserToken, user_tokens_revoked
+
+
+_logger = logging.getLogger(__name__)
+
+revocation_filter_checks = Counter(
+    "access_user_token_revocation_filter_checks_total",
+    "User token revocation checks by result of the in-process filter",
+)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.size = max(
+            8,
+            math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2),
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _get_positions(self, value: str) -> Iterable[int]:
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str):
+        for position in self._get_positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._get_positions(value)
+        )
+
+
+class RevocationFilter:
+    """
+    Bloom filter of all user tokens revoked when it was loaded. Tokens revoked
+    afterwards are kept in an exact set, fed by `user_tokens_revoked` of this
+    process and broadcasted by all other processes.
+    """
+
+    def __init__(self, ids: List[str], loaded_at: float):
+        self.loaded_at = loaded_at
+        self._bloom = BloomFilter(
+            capacity=max(len(ids) * 2, 1000),
+            false_positive_rate=settings.USER_TOKEN_REVOCATION_FILTER_FALSE_POSITIVE_RATE,
+        )
+        for id in ids:
+            self._bloom.add(id)
+
+    @classmethod
+    def load(cls) -> "RevocationFilter":
+        loaded_at = monotonic()
+        ids = list(
+            UserToken.objects.filter(
+                type=UserToken.Types.USER,
+                is_active=False,
+                create_date__gte=timezone.now() - User.USER_TOKEN_VALIDITY,
+            ).values_list("id", flat=True)
+        )
+        return cls(ids, loaded_at)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._bloom
+
+
+_lock = threading.Lock()
+_filter: Optional[RevocationFilter] = None
+_recent: Dict[str, float] = {}
+
+
+def get_revocation_filter() -> RevocationFilter:
+    global _filter
+
+    revocation_filter = _filter
+    if (
+        revocation_filter
+        and monotonic() - revocation_filter.loaded_at
+        < settings.USER_TOKEN_REVOCATION_FILTER_RELOAD_INTERVAL
+    ):
+        return revocation_filter
+
+    with _lock:
+        if _filter is not revocation_filter:
+            return _filter
+
+        revocation_filter = RevocationFilter.load()
+        # revocations received before loading are included in the loaded filter
+        for id, received_at in list(_recent.items()):
+            if received_at < revocation_filter.loaded_at:
+                _recent.pop(id, None)
+
+        _filter = revocation_filter
+        _logger.info("Loaded user token revocation filter")
+
+    return revocation_filter
+
+
+def is_revoked(id: str) -> Optional[bool]:
+    """
+    Check a user token by its id (`jti`): `True` if revoked, `False` if not, and
+    `None` if the database has to be checked.
+    """
+    revocation_filter = get_revocation_filter()
+    if id in _recent:
+        result = True
+
+    elif id in revocation_filter:
+        result = None
+
+    else:
+        result = False
+
+    revocation_filter_checks.inc(
+        result={True: "revoked", False: "valid", None: "unknown"}[result]
+    )
+    return result
+
+
+@receiver(user_tokens_revoked)
+def user_tokens_revoked_receiver(sender, ids: List[str], **kwargs):
+    received_at = monotonic()
+    for id in ids:
+        _recent[id] = received_at
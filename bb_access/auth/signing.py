@@ -0,0 +1,194 @@
+import json
+import multiprocessing
+from calendar import timegm
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jose import jwk, jws
+from jose.utils import base64url_encode
+
+from bb_access.auth.keys import (
+    ALGORITHM_EDDSA,
+    EC_ALGORITHMS,
+    VerificationKey,
+    load_private_key,
+)
+from bb_access.metrics import Gauge, Summary
+
+
+signer_pool_queue_depth = Gauge(
+    "access_jwt_signer_pool_queue_depth",
+    "Tokens submitted to the signing pool and not yet signed",
+)
+signer_pool_latency = Summary(
+    "access_jwt_signer_pool_latency_seconds",
+    "Time from submitting claims to the signing pool until the token is returned",
+)
+
+
+class Signer:
+    """
+    Signs JWT claims with a private key which is parsed once when the signer is
+    created. Backends are selected by `JWT_SIGNER_BACKEND`, the algorithm by
+    `JWT_ALGORITHM`. Tokens carry the `kid` of the key, see `bb_access.auth.keys`.
+    """
+
+    BACKEND: str
+    ALGORITHMS: Tuple[str, ...]
+
+    def __init__(self, private_key: str, algorithm: str):
+        if algorithm not in self.ALGORITHMS:
+            raise ImproperlyConfigured(
+                f"JWT signer {self.BACKEND} does not support {algorithm}"
+            )
+
+        self.algorithm = algorithm
+        self._private_key = load_private_key(private_key, algorithm)
+        self.kid = VerificationKey(self._private_key.public_key()).kid
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def _prepare_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+        claims = dict(claims)
+        for time_claim in ("exp", "iat", "nbf"):
+            if isinstance(claims.get(time_claim), datetime):
+                claims[time_claim] = timegm(claims[time_claim].utctimetuple())
+
+        return claims
+
+    @classmethod
+    def get_signer_class(cls, backend: str):
+        for scls in cls.__subclasses__():
+            if scls.BACKEND == backend:
+                return scls
+
+        raise NotImplementedError
+
+
+class JoseSigner(Signer):
+    BACKEND = "JOSE"
+    ALGORITHMS = tuple(EC_ALGORITHMS)
+
+    def __init__(self, private_key: str, algorithm: str):
+        super().__init__(private_key, algorithm)
+        self._key = jwk.construct(private_key, algorithm)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        return jws.sign(
+            self._prepare_claims(claims),
+            self._key,
+            headers={"kid": self.kid},
+            algorithm=self.algorithm,
+        )
+
+
+class CryptographySigner(Signer):
+    """
+    Signs with `cryptography` directly, skipping the key wrappers of `jose`.
+    The produced tokens are identical in structure to those of `JoseSigner`.
+    """
+
+    BACKEND = "CRYPTOGRAPHY"
+    ALGORITHMS = (*EC_ALGORITHMS, ALGORITHM_EDDSA)
+
+    def __init__(self, private_key: str, algorithm: str):
+        super().__init__(private_key, algorithm)
+        self._header = base64url_encode(
+            json.dumps(
+                {"alg": algorithm, "kid": self.kid, "typ": "JWT"},
+                separators=(",", ":"),
+                sort_keys=True,
+            ).encode()
+        )
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self.algorithm == ALGORITHM_EDDSA:
+            return self._private_key.sign(signing_input)
+
+        size = (self._private_key.curve.key_size + 7) // 8
+        r, s = decode_dss_signature(
+            self._private_key.sign(
+                signing_input, ec.ECDSA(EC_ALGORITHMS[self.algorithm][1]())
+            )
+        )
+        return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        signing_input = (
+            self._header
+            + b"."
+            + base64url_encode(
+                json.dumps(self._prepare_claims(claims), separators=(",", ":")).encode()
+            )
+        )
+
+        return (
+            signing_input + b"." + base64url_encode(self._sign(signing_input))
+        ).decode()
+
+
+_worker_signer: Optional[Signer] = None
+
+
+def _init_worker(backend: str, private_key: str, algorithm: str):
+    global _worker_signer
+
+    _worker_signer = Signer.get_signer_class(backend)(private_key, algorithm)
+
+
+def _sign_in_worker(claims: Dict[str, Any]) -> str:
+    return _worker_signer.sign(claims)
+
+
+class PooledSigner:
+    """
+    Signs in a pool of worker processes, each holding its own signer, so token
+    issuance is not bound to the core of the calling process.
+    """
+
+    def __init__(self, backend: str, private_key: str, algorithm: str, size: int):
+        self.kid = Signer.get_signer_class(backend)(private_key, algorithm).kid
+        self._executor = ProcessPoolExecutor(
+            max_workers=size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, private_key, algorithm),
+        )
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        claims = Signer._prepare_claims(claims)
+        signer_pool_queue_depth.inc()
+        time_start = perf_counter()
+        try:
+            return self._executor.submit(_sign_in_worker, claims).result()
+
+        finally:
+            signer_pool_queue_depth.dec()
+            signer_pool_latency.observe(perf_counter() - time_start)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+@lru_cache(maxsize=None)
+def get_signer() -> Union[Signer, PooledSigner]:
+    if settings.JWT_SIGNER_POOL_SIZE:
+        return PooledSigner(
+            settings.JWT_SIGNER_BACKEND,
+            settings.JWT_PRIVATE_KEY,
+            settings.JWT_ALGORITHM,
+            settings.JWT_SIGNER_POOL_SIZE,
+        )
+
+    return Signer.get_signer_class(settings.JWT_SIGNER_BACKEND)(
+        settings.JWT_PRIVATE_KEY, settings.JWT_ALGORITHM
+    )
@@ -0,0 +1,180 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from time import monotonic, time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from djdantic.schemas import Error
+from fastapi.exceptions import HTTPException
+
+from bb_access.metrics import Counter
+
+
+login_throttle_checks = Counter(
+    "access_login_throttle_checks_total",
+    "Login attempts checked by the throttle by bucket and result",
+)
+
+
+class LoginThrottledError(HTTPException):
+    def __init__(
+        self,
+        status_code: int = 429,
+        detail: Any = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class ThrottleBackend:
+    """
+    Token buckets holding up to `burst` tokens, refilled by `rate` tokens per
+    second.
+    """
+
+    BACKEND: str
+
+    def consume(self, key: str, *, rate: float, burst: int) -> float:
+        """
+        Take a token of the bucket `key`. Returns `0` if there was one, otherwise
+        the seconds until the next token is available.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def get_backend_class(cls, backend: str):
+        for scls in cls.__subclasses__():
+            if scls.BACKEND == backend:
+                return scls
+
+        raise NotImplementedError
+
+
+class MemoryThrottleBackend(ThrottleBackend):
+    """
+    Buckets of this process, the `LOGIN_THROTTLE_MEMORY_SIZE` most recently used
+    are kept.
+    """
+
+    BACKEND = "MEMORY"
+
+    def __init__(self):
+        self.size = settings.LOGIN_THROTTLE_MEMORY_SIZE
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def consume(self, key: str, *, rate: float, burst: int) -> float:
+        now = monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+
+            else:
+                wait = (1 - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+
+class CacheThrottleBackend(ThrottleBackend):
+    """
+    Buckets in the Django cache `LOGIN_THROTTLE_CACHE` (e.g. Redis), shared by
+    all processes using it. A bucket is stored as the time it is full again
+    (GCRA), concurrent attempts on the same key may race, so the limit is
+    approximate.
+    """
+
+    BACKEND = "CACHE"
+
+    def __init__(self):
+        self._cache = caches[settings.LOGIN_THROTTLE_CACHE]
+
+    def consume(self, key: str, *, rate: float, burst: int) -> float:
+        now = time()
+        interval = 1 / rate
+        cache_key = f"bb_access:login_throttle:{key}"
+        full_at = max(self._cache.get(cache_key, now), now) + interval
+        wait = full_at - now - burst * interval
+        if wait > 0:
+            return wait
+
+        self._cache.set(cache_key, full_at, timeout=math.ceil(full_at - now))
+        return 0.0
+
+
+@lru_cache(maxsize=None)
+def get_throttle_backend() -> ThrottleBackend:
+    return ThrottleBackend.get_backend_class(settings.LOGIN_THROTTLE_BACKEND)()
+
+
+def check_login_throttle(
+    client_ip: Optional[str],
+    *,
+    tenant_id: str,
+    login: Optional[str],
+    is_service_credential: bool = False,
+):
+    """
+    Take a token of the buckets of the client IP and of the account (`login`
+    within the tenant). Called before the credentials are checked, so throttled
+    attempts cause no hashing at all.
+
+    Logins with a service credential, which services repeat routinely and which
+    cannot be guessed, only count against the bucket of the client IP. As that
+    is only known once the user is loaded, the account bucket is taken
+    separately (without `client_ip`) if the user turns out to have none. All
+    clients behind a shared NAT or proxy share the bucket of one IP, so
+    `LOGIN_THROTTLE_IP_*` has to allow for their combined logins.
+    """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return
+
+    buckets = []
+    if client_ip:
+        buckets.append(
+            (
+                "ip",
+                client_ip,
+                settings.LOGIN_THROTTLE_IP_PER_MINUTE,
+                settings.LOGIN_THROTTLE_IP_BURST,
+            )
+        )
+
+    if login and not is_service_credential:
+        buckets.append(
+            (
+                "account",
+                f"{tenant_id}:{login.lower()}",
+                settings.LOGIN_THROTTLE_ACCOUNT_PER_MINUTE,
+                settings.LOGIN_THROTTLE_ACCOUNT_BURST,
+            )
+        )
+
+    backend = get_throttle_backend()
+    wait = 0.0
+    for bucket, key, per_minute, burst in buckets:
+        bucket_wait = backend.consume(
+            f"{bucket}:{hashlib.sha256(key.encode()).hexdigest()}",
+            rate=per_minute / 60,
+            burst=burst,
+        )
+        login_throttle_checks.inc(
+            bucket=bucket, result="throttled" if bucket_wait else "allowed"
+        )
+        wait = max(wait, bucket_wait)
+
+    if wait:
+        raise LoginThrottledError(
+            detail=Error(code="too_many_login_attempts"),
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import timedelta
+from time import time
+from typing import Callable, Tuple
+
+from django.conf import settings
+
+from bb_access.auth.cache import ExpiringLRUCache
+from bb_access.auth.graph import get_graph
+from bb_access.metrics import Counter
+from bb_access.models import AccessGeneration
+
+
+def get_generation() -> int:
+    if settings.ACCESS_GRAPH_CACHE_ENABLED:
+        return get_graph().generation
+
+    return AccessGeneration.get_current()
+
+
+class TransactionTokenCache(ExpiringLRUCache):
+    """
+    Issued transaction tokens by the credential they were issued for. A token
+    is handed out again while it is valid for at least
+    `TRANSACTION_TOKEN_CACHE_MIN_LIFETIME` seconds, changes of roles or scopes
+    start a new generation and therefore new tokens.
+    """
+
+    @staticmethod
+    def get_key(
+        credential: str, *, include_critical: bool, compact: bool
+    ) -> Tuple[str, bool, bool, int]:
+        return (
+            hashlib.sha256(credential.encode()).hexdigest(),
+            include_critical,
+            compact,
+            get_generation(),
+        )
+
+    def get_or_create(
+        self, key: Tuple, create: Callable[[], str], *, validity: timedelta
+    ) -> str:
+        token = self.get(key, settings.TRANSACTION_TOKEN_CACHE_MIN_LIFETIME)
+        if token is None:
+            expire_at = time() + validity.total_seconds()
+            token = create()
+            self.set(key, token, expire_at)
+
+        return token
+
+
+transaction_token_cache = TransactionTokenCache(
+    settings.TRANSACTION_TOKEN_CACHE_SIZE,
+    Counter(
+        "access_transaction_token_cache_requests_total",
+        "Lookups of reusable transaction tokens by result",
+    ),
+)
@@ -0,0 +1,67 @@
+import json
+import logging
+from threading import Thread
+from time import sleep
+
+from kafka import KafkaConsumer
+from django.conf import settings
+
+from bb_access import models
+from .publish import generation, tokens
+
+
+_logger = logging.getLogger(__name__)
+
+
+class BroadcastListener(Thread):
+    """
+    Receives the access generations and revoked user tokens broadcasted by all
+    processes. The topics are read without a consumer group, so every process
+    receives every message.
+    """
+
+    def __init__(self):
+        super().__init__(name=self.__class__.__name__, daemon=True)
+        self.handlers = {
+            generation.TOPIC: self.handle_generation,
+            tokens.TOPIC: self.handle_user_tokens_revoked,
+        }
+
+    def _get_consumer(self) -> KafkaConsumer:
+        return KafkaConsumer(
+            *self.handlers,
+            bootstrap_servers=settings.BROKER_URL,
+            group_id=None,
+            auto_offset_reset="latest",
+            enable_auto_commit=False,
+            request_timeout_ms=settings.BROKER_REQUEST_TIMEOUT,
+            security_protocol=settings.BROKER_SECURITY_PROTOCOL,
+            sasl_mechanism=settings.BROKER_SASL_MECHANISM,
+            sasl_plain_username=settings.BROKER_SASL_PLAIN_USERNAME,
+            sasl_plain_password=settings.BROKER_SASL_PLAIN_PASSWORD,
+            ssl_cafile=settings.BROKER_SSL_CERTFILE,
+        )
+
+    def handle_generation(self, value: bytes):
+        models.access_generation_changed.send(
+            sender=models.AccessGeneration,
+            generation=json.loads(value)["generation"],
+            is_remote=True,
+        )
+
+    def handle_user_tokens_revoked(self, value: bytes):
+        models.user_tokens_revoked.send(
+            sender=models.UserToken,
+            ids=json.loads(value)["ids"],
+            is_remote=True,
+        )
+
+    def run(self):
+        while True:
+            try:
+                for message in self._get_consumer():
+                    self.handlers[message.topic](message.value)
+
+            except Exception as error:
+                _logger.exception(error)
+                sleep(5)
@@ -0,0 +1,54 @@
+import logging
+from typing import Dict, List
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.transaction import atomic
+from django.utils import timezone
+from kafka.producer.future import FutureRecordMetadata
+
+from bb_access import models
+from .publish.users import UserLoginPublisher
+
+
+_logger = logging.getLogger(__name__)
+
+
+@atomic
+def relay_login_events(batch_size: int) -> int:
+    """
+    Publish up to `batch_size` recorded logins, update `last_login` of their
+    users in one query and delete the events. Events are only deleted once the
+    broker acknowledged all messages, so a failure publishes them again with the
+    next batch (at least once). Several relays may run, each locks its own batch.
+    """
+    events: List[models.UserLoginEvent] = list(
+        models.UserLoginEvent.objects.select_for_update(skip_locked=True, of=("self",))
+        .select_related("user")
+        .order_by("id")[:batch_size]
+    )
+    if not events:
+        return 0
+
+    futures: List[FutureRecordMetadata] = []
+    users: Dict[str, models.User] = {}
+    for event in events:
+        publisher = UserLoginPublisher(models.User, event.user, user_logged_in)
+        futures.append(publisher.connection.send(**publisher.data))
+        user = users.setdefault(event.user_id, event.user)
+        user.last_login = max(user.last_login or event.logged_in_at, event.logged_in_at)
+
+    UserLoginPublisher.connection.flush()
+    for future in futures:
+        future.get()
+
+    time_now = timezone.now()
+    for user in users.values():
+        user.last_kafka_publish_at = time_now
+
+    models.User.objects.bulk_update(
+        users.values(), ["last_login", "last_kafka_publish_at"]
+    )
+    models.UserLoginEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+    _logger.info("Relayed %d login events of %d users", len(events), len(users))
+    return len(events)
@@ -1,2 +1,2 @@
 from ._connection import connection
-from . import users  # , tenants
+from . import users, generation, tokens  # , tenants
@@ -0,0 +1,22 @@
+import json
+
+from django.dispatch import receiver
+
+from bb_access import models
+from . import connection
+
+
+TOPIC = "bizberry.access.generation"
+
+
+@receiver(models.access_generation_changed)
+def publish_access_generation(
+    sender, generation: int, is_remote: bool = False, **kwargs
+):
+    if is_remote:
+        return
+
+    connection.send(
+        TOPIC,
+        value=json.dumps({"generation": generation}).encode("utf-8"),
+    )
@@ -0,0 +1,23 @@
+import json
+from typing import List
+
+from django.dispatch import receiver
+
+from bb_access import models
+from . import connection
+
+
+TOPIC = "bizberry.access.tokens.revoked"
+
+
+@receiver(models.user_tokens_revoked)
+def publish_user_tokens_revoked(
+    sender, ids: List[str], is_remote: bool = False, **kwargs
+):
+    if is_remote:
+        return
+
+    connection.send(
+        TOPIC,
+        value=json.dumps({"ids": ids}).encode("utf-8"),
+    )
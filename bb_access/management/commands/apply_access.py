@@ -5,8 +5,9 @@ import yaml
 
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 from django.conf import settings
+from django.db.transaction import atomic
 
-from bb_access.models import Scope, Role
+from bb_access.models import Scope, Role, RoleEffectiveScope, AccessGeneration
 
 
 _logger = logging.getLogger(__name__)
@@ -117,8 +118,12 @@ class Command(BaseCommand):
         if old_roles:
             _logger.info("Deactivated %i roles", len(old_roles))
 
+    @atomic
     def handle(self, *args, **options):
         with open(options["file"], "r") as file:
             definition = yaml.load(file, Loader=yaml.Loader)
             self.sync_scopes(definition["scopes"])
             self.sync_roles(definition["roles"])
+
+        RoleEffectiveScope.schedule_refresh()
+        AccessGeneration.bump()
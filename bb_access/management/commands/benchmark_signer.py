@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from time import perf_counter
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+from djutils.crypt import random_string_generator
+from jose import jwt
+
+from bb_access.auth.cache import ExpiringLRUCache
+from bb_access.auth.keys import ALGORITHM_EDDSA, EC_ALGORITHMS, VerificationKey
+from bb_access.auth.signing import Signer, PooledSigner
+from bb_access.metrics import Counter
+from bb_access.utils import JWTToken
+
+
+class Command(BaseCommand):
+    help = "Measure the tokens per second of each JWT signer backend"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--count", type=int, default=1000, required=False)
+        parser.add_argument(
+            "--algorithm",
+            choices=[*EC_ALGORITHMS, ALGORITHM_EDDSA],
+            required=False,
+            help="Measure a new key of this algorithm instead of JWT_PRIVATE_KEY",
+        )
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=0,
+            required=False,
+            help="Also measure a signing pool of this size with as many callers",
+        )
+
+    def handle(self, *args, **options):
+        algorithm = options["algorithm"] or settings.JWT_ALGORITHM
+        private_key = settings.JWT_PRIVATE_KEY
+        if options["algorithm"] or not private_key:
+            if algorithm == ALGORITHM_EDDSA:
+                key = ed25519.Ed25519PrivateKey.generate()
+
+            else:
+                key = ec.generate_private_key(EC_ALGORITHMS[algorithm][0]())
+
+            private_key = key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            ).decode()
+
+        time_now = timezone.now()
+        claims = {
+            "iss": settings.JWT_ISSUER,
+            "iat": time_now,
+            "nbf": time_now,
+            "exp": time_now + timedelta(minutes=5),
+            "sub": random_string_generator(size=64),
+            "aud": ["access.users.request_transaction_token"],
+            "jti": random_string_generator(size=128),
+        }
+
+        signers = {}
+        if algorithm in EC_ALGORITHMS:
+            signers["JOSE (key per call)"] = lambda claims: jwt.encode(
+                dict(claims), key=private_key, algorithm=algorithm
+            )
+
+        for signer_class in Signer.__subclasses__():
+            if algorithm in signer_class.ALGORITHMS:
+                signers[signer_class.BACKEND] = signer_class(
+                    private_key, algorithm
+                ).sign
+
+        for name, sign in signers.items():
+            self._measure(f"{algorithm} {name}", sign, claims, count=options["count"])
+
+        pool_size = options["pool_size"]
+        if pool_size:
+            pooled_signer = PooledSigner(
+                settings.JWT_SIGNER_BACKEND, private_key, algorithm, pool_size
+            )
+            self._measure(
+                f"{algorithm} {settings.JWT_SIGNER_BACKEND} (pool of {pool_size})",
+                pooled_signer.sign,
+                claims,
+                count=options["count"],
+                concurrency=pool_size,
+            )
+            pooled_signer.shutdown()
+
+        verification_key = VerificationKey(
+            serialization.load_pem_private_key(
+                private_key.encode(), password=None
+            ).public_key()
+        )
+        token = list(signers.values())[-1](claims)
+        for name, claims_cache in (
+            ("verify", None),
+            ("verify (cached)", ExpiringLRUCache(1, Counter("benchmark", ""))),
+        ):
+            self._measure(
+                f"{algorithm} {name}",
+                JWTToken(
+                    verification_keys=lambda: {verification_key.kid: verification_key},
+                    claims_cache=claims_cache,
+                ).decode_token,
+                token,
+                count=options["count"],
+            )
+
+    def _measure(self, name: str, func, value, *, count: int, concurrency: int = 1):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda _: func(value), range(concurrency)))
+            time_start = perf_counter()
+            list(executor.map(lambda _: func(value), range(count)))
+            duration = perf_counter() - time_start
+
+        self.stdout.write(
+            f"{name}: {count / duration:.0f} tokens/s "
+            f"({duration / count * 1000:.3f} ms/token)"
+        )
@@ -0,0 +1,74 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from bb_access import metrics
+from bb_access.media_sender.outbox import claim_deliveries, deliver, get_batches
+
+
+_logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send the OTP messages queued with OTP_DELIVERY_OUTBOX_ENABLED"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.OTP_DELIVERY_CONCURRENCY,
+            required=False,
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.OTP_DELIVERY_BATCH_SIZE,
+            required=False,
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=0,
+            required=False,
+            help="Serve the delivery metrics on this port",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once no deliveries are due instead of waiting for new ones",
+        )
+
+    def handle(self, *args, **options):
+        if options["metrics_port"]:
+            metrics.serve(options["metrics_port"])
+
+        with ThreadPoolExecutor(
+            max_workers=options["concurrency"], thread_name_prefix="deliver_otps"
+        ) as executor:
+            while True:
+                try:
+                    deliveries = claim_deliveries(options["batch_size"])
+
+                except Exception:
+                    _logger.exception("Claiming OTP deliveries failed")
+                    deliveries = []
+
+                for batch, future in [
+                    (batch, executor.submit(deliver, batch))
+                    for batch in get_batches(deliveries, options["concurrency"])
+                ]:
+                    if future.exception():
+                        _logger.error(
+                            "OTP deliveries %s failed",
+                            ", ".join(str(delivery.id) for delivery in batch),
+                            exc_info=future.exception(),
+                        )
+
+                if len(deliveries) < options["batch_size"]:
+                    if options["once"]:
+                        return
+
+                    sleep(settings.OTP_DELIVERY_POLL_INTERVAL)
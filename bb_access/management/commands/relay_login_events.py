@@ -0,0 +1,42 @@
+import logging
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from bb_access.events.outbox import relay_login_events
+
+
+_logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publish the logins recorded with LOGIN_OUTBOX_ENABLED and update last_login"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.LOGIN_OUTBOX_BATCH_SIZE,
+            required=False,
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once no events are left instead of waiting for new ones",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                count = relay_login_events(options["batch_size"])
+
+            except Exception:
+                _logger.exception("Relaying login events failed")
+                count = 0
+
+            if count < options["batch_size"]:
+                if options["once"]:
+                    return
+
+                sleep(settings.LOGIN_OUTBOX_RELAY_INTERVAL)
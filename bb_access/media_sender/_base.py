@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 from functools import cached_property
+from typing import List, Optional
 
 import jinja2
 from pydantic import BaseModel
@@ -18,6 +19,7 @@ class Content(BaseModel):
     template: str
     language: str
     values: dict
+    rendered: Optional[str] = None
 
     @property
     def _jinja_env(self):
@@ -64,6 +66,9 @@ class Content(BaseModel):
 
     @property
     def body(self) -> str:
+        if self.rendered is not None:
+            return self.rendered
+
         return self._template_render()
 
 
@@ -78,6 +83,25 @@ class Sender:
     def send(self):
         raise NotImplementedError
 
+    @classmethod
+    def send_batch(cls, contents: List[Content]) -> List[Optional[Exception]]:
+        """
+        Send all `contents`, returning the error of each message or `None` if it
+        was sent. Integrations override this to share a connection.
+        """
+        errors: List[Optional[Exception]] = []
+        for content in contents:
+            try:
+                cls(content).send()
+
+            except Exception as error:
+                errors.append(error)
+
+            else:
+                errors.append(None)
+
+        return errors
+
     @classmethod
     def get_sender(cls, medium: str):
         for scls in cls.__subclasses__():
@@ -1,5 +1,10 @@
 import smtplib
 import socket
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from time import monotonic
+from typing import Iterator, List, Optional, Tuple
 from unidecode import unidecode
 
 from email.message import EmailMessage
@@ -7,7 +12,151 @@ from email.headerregistry import Address
 from django.conf import settings
 from djutils.crypt import random_string_generator
 
-from . import Sender
+from bb_access.metrics import Counter
+from . import Sender, Content
+
+
+smtp_sessions = Counter(
+    "access_smtp_sessions_total",
+    "SMTP sessions taken from the pool by result",
+)
+
+
+def is_session_usable(error: Exception) -> bool:
+    """
+    Whether the session is still usable after `error`, which is the case if the
+    server rejected the message instead of the connection failing.
+    """
+    return isinstance(
+        error,
+        (
+            smtplib.SMTPResponseException,
+            smtplib.SMTPRecipientsRefused,
+            smtplib.SMTPNotSupportedError,
+        ),
+    )
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP sessions open for reuse. A session is
+    checked with NOOP before it is reused, sessions idle for longer than
+    `max_idle` seconds are closed instead, as servers drop them anyway.
+    """
+
+    def __init__(self, size: int, max_idle: float):
+        self.size = size
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP
+        if (
+            settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_SSL
+            and not settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_STARTTLS
+        ):
+            connection = smtplib.SMTP_SSL
+
+        smtp = connection(
+            host=settings.SENDER_EMAIL_INTEGRATION_SMTP_HOST,
+            port=settings.SENDER_EMAIL_INTEGRATION_SMTP_PORT,
+            timeout=settings.SENDER_EMAIL_INTEGRATION_SMTP_TIMEOUT,
+        )
+        try:
+            if settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_STARTTLS:
+                smtp.starttls()
+
+            if (
+                settings.SENDER_EMAIL_INTEGRATION_SMTP_USER
+                and settings.SENDER_EMAIL_INTEGRATION_SMTP_PASSWORD
+            ):
+                smtp.login(
+                    user=settings.SENDER_EMAIL_INTEGRATION_SMTP_USER,
+                    password=settings.SENDER_EMAIL_INTEGRATION_SMTP_PASSWORD,
+                )
+
+        except Exception:
+            smtp.close()
+            raise
+
+        return smtp
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @staticmethod
+    def _is_alive(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+
+                smtp, released_at = self._idle.pop()
+
+            if monotonic() - released_at > self.max_idle:
+                self._close(smtp)
+                smtp_sessions.inc(result="expired")
+
+            elif self._is_alive(smtp):
+                smtp_sessions.inc(result="reused")
+                return smtp
+
+            else:
+                smtp.close()
+                smtp_sessions.inc(result="broken")
+
+        smtp_sessions.inc(result="opened")
+        return self._connect()
+
+    def release(self, smtp: smtplib.SMTP, *, is_broken: bool = False):
+        if not is_broken:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append((smtp, monotonic()))
+                    return
+
+        self._close(smtp)
+
+    @contextmanager
+    def session(self) -> Iterator[smtplib.SMTP]:
+        smtp = self.acquire()
+        try:
+            yield smtp
+
+        except Exception as error:
+            self.release(smtp, is_broken=not is_session_usable(error))
+            raise
+
+        else:
+            self.release(smtp)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for smtp, _ in idle:
+            self._close(smtp)
+
+
+@lru_cache(maxsize=None)
+def get_connection_pool() -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        settings.SENDER_EMAIL_INTEGRATION_SMTP_POOL_SIZE,
+        settings.SENDER_EMAIL_INTEGRATION_SMTP_POOL_MAX_IDLE,
+    )
 
 
 class EmailSender(Sender):
@@ -34,38 +183,19 @@ class SMTPEmailSender(EmailSender):
 
         return message
 
-    def _send_message(self, message):
-        connection = smtplib.SMTP
-        if (
-            settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_SSL
-            and not settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_STARTTLS
-        ):
-            connection = smtplib.SMTP_SSL
-
-        with connection(
-            host=settings.SENDER_EMAIL_INTEGRATION_SMTP_HOST,
-            port=settings.SENDER_EMAIL_INTEGRATION_SMTP_PORT,
-            timeout=settings.SENDER_EMAIL_INTEGRATION_SMTP_TIMEOUT,
-        ) as smtp:
-            if settings.SENDER_EMAIL_INTEGRATION_SMTP_USE_STARTTLS:
-                smtp.starttls()
-
-            if (
-                settings.SENDER_EMAIL_INTEGRATION_SMTP_USER
-                and settings.SENDER_EMAIL_INTEGRATION_SMTP_PASSWORD
-            ):
-                smtp.login(
-                    user=settings.SENDER_EMAIL_INTEGRATION_SMTP_USER,
-                    password=settings.SENDER_EMAIL_INTEGRATION_SMTP_PASSWORD,
-                )
+    def _send_message(self, message, smtp: Optional[smtplib.SMTP] = None):
+        if smtp:
+            smtp.send_message(message)
+            return
 
+        with get_connection_pool().session() as smtp:
             smtp.send_message(message)
 
-    def send(self):
+    def send(self, smtp: Optional[smtplib.SMTP] = None):
         while True:
             try:
                 message = self._get_message()
-                self._send_message(message)
+                self._send_message(message, smtp)
 
             except smtplib.SMTPNotSupportedError as error:
                 if isinstance(error.__cause__, UnicodeEncodeError):
@@ -80,3 +210,33 @@ class SMTPEmailSender(EmailSender):
 
             else:
                 break
+
+    @classmethod
+    def send_batch(cls, contents: List[Content]) -> List[Optional[Exception]]:
+        """
+        Send all `contents` over one pooled session, which is replaced if the
+        connection fails in between.
+        """
+        pool = get_connection_pool()
+        errors: List[Optional[Exception]] = []
+        smtp: Optional[smtplib.SMTP] = None
+        for content in contents:
+            try:
+                if smtp is None:
+                    smtp = pool.acquire()
+
+                cls(content).send(smtp)
+
+            except Exception as error:
+                errors.append(error)
+                if smtp is not None and not is_session_usable(error):
+                    pool.release(smtp, is_broken=True)
+                    smtp = None
+
+            else:
+                errors.append(None)
+
+        if smtp is not None:
+            pool.release(smtp)
+
+        return errors
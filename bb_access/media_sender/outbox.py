@@ -0,0 +1,167 @@
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from bb_access import models
+from bb_access.metrics import Counter, Summary
+from . import Sender, Content
+
+
+_logger = logging.getLogger(__name__)
+
+otp_deliveries = Counter(
+    "access_otp_deliveries_total",
+    "OTP deliveries by medium and result",
+)
+otp_delivery_duration = Summary(
+    "access_otp_delivery_seconds",
+    "Time sending an OTP message takes by medium",
+)
+
+
+@atomic
+def claim_deliveries(batch_size: int) -> List[models.UserOTPDelivery]:
+    """
+    Take up to `batch_size` due deliveries. They are hidden from other workers
+    for `OTP_DELIVERY_LEASE` seconds, so they are sent without holding a lock.
+    """
+    time_now = timezone.now()
+    deliveries = list(
+        models.UserOTPDelivery.objects.select_for_update(skip_locked=True)
+        .select_related("otp")
+        .filter(next_attempt_at__lte=time_now)
+        .order_by("next_attempt_at")[:batch_size]
+    )
+    models.UserOTPDelivery.objects.filter(
+        id__in=[delivery.id for delivery in deliveries]
+    ).update(next_attempt_at=time_now + timedelta(seconds=settings.OTP_DELIVERY_LEASE))
+
+    return deliveries
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.OTP_DELIVERY_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def get_batches(
+    deliveries: List[models.UserOTPDelivery], count: int
+) -> List[List[models.UserOTPDelivery]]:
+    """
+    Split claimed deliveries into batches of one medium each, every medium into
+    at most `count` batches, so they can be sent in parallel.
+    """
+    by_medium: Dict[str, List[models.UserOTPDelivery]] = defaultdict(list)
+    for delivery in deliveries:
+        by_medium[delivery.medium].append(delivery)
+
+    batches = []
+    for medium_deliveries in by_medium.values():
+        size = math.ceil(len(medium_deliveries) / max(count, 1))
+        for i in range(0, len(medium_deliveries), size):
+            batches.append(medium_deliveries[i : i + size])
+
+    return batches
+
+
+def _retry(delivery: models.UserOTPDelivery, error: Exception):
+    delivery.attempts += 1
+    if delivery.attempts >= settings.OTP_DELIVERY_MAX_ATTEMPTS:
+        _logger.error(
+            "Giving up OTP delivery %s after %d attempts: %r",
+            delivery.id,
+            delivery.attempts,
+            error,
+        )
+        delivery.delete()
+        otp_deliveries.inc(medium=delivery.medium, result="failed")
+        return
+
+    _logger.warning(
+        "OTP delivery %s failed (attempt %d): %r",
+        delivery.id,
+        delivery.attempts,
+        error,
+    )
+    delivery.last_error = repr(error)
+    delivery.next_attempt_at = timezone.now() + get_retry_delay(delivery.attempts)
+    delivery.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+    otp_deliveries.inc(medium=delivery.medium, result="retry")
+
+
+def deliver(deliveries: List[models.UserOTPDelivery]):
+    """
+    Send claimed deliveries of one medium with a single `Sender.send_batch`,
+    which lets the integration share one connection. Failed deliveries are
+    retried with exponential backoff and dropped after
+    `OTP_DELIVERY_MAX_ATTEMPTS` attempts.
+    """
+    try:
+        time_now = timezone.now()
+        due: List[models.UserOTPDelivery] = []
+        expired: List[models.UserOTPDelivery] = []
+        for delivery in deliveries:
+            otp = delivery.otp
+            if otp.used_at or otp.expire_at < time_now:
+                expired.append(delivery)
+
+            else:
+                due.append(delivery)
+
+        if expired:
+            models.UserOTPDelivery.objects.filter(
+                id__in=[delivery.id for delivery in expired]
+            ).delete()
+            for delivery in expired:
+                otp_deliveries.inc(medium=delivery.medium, result="expired")
+
+        if not due:
+            return
+
+        medium = due[0].medium
+        time_start = perf_counter()
+        try:
+            errors: List[Optional[Exception]] = Sender.get_sender(medium).send_batch(
+                [
+                    Content(
+                        subject=delivery.subject,
+                        receiver=delivery.receiver,
+                        template="",
+                        language="",
+                        values={},
+                        rendered=delivery.body,
+                    )
+                    for delivery in due
+                ]
+            )
+
+        except Exception as error:
+            errors = [error] * len(due)
+
+        duration = (perf_counter() - time_start) / len(due)
+
+        sent: List[models.UserOTPDelivery] = []
+        for delivery, error in zip(due, errors):
+            if error:
+                _retry(delivery, error)
+
+            else:
+                sent.append(delivery)
+
+        if sent:
+            models.UserOTPDelivery.objects.filter(
+                id__in=[delivery.id for delivery in sent]
+            ).delete()
+            for delivery in sent:
+                otp_delivery_duration.observe(duration, medium=medium)
+                otp_deliveries.inc(medium=medium, result="sent")
+
+    finally:
+        close_old_connections()
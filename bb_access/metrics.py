@@ -0,0 +1,116 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Tuple
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metric:
+    """
+    Minimal in-process metric, rendered in the Prometheus text format by
+    `render`. Values are kept per process.
+    """
+
+    registry: Dict[str, "Metric"] = {}
+
+    TYPE: str
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Labels], float] = {}
+        Metric.registry[name] = self
+
+    @staticmethod
+    def _get_labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def _add(self, value: float, labels: Labels, suffix: str = ""):
+        with self._lock:
+            key = (suffix, labels)
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, suffix: str = "", **labels) -> float:
+        return self._values.get((suffix, self._get_labels(labels)), 0)
+
+    def collect(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            values = list(self._values.items())
+
+        for (suffix, labels), value in sorted(values):
+            yield self.name + suffix, labels, value
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, value: float = 1, **labels):
+        self._add(value, self._get_labels(labels))
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def inc(self, value: float = 1, **labels):
+        self._add(value, self._get_labels(labels))
+
+    def dec(self, value: float = 1, **labels):
+        self._add(-value, self._get_labels(labels))
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[("", self._get_labels(labels))] = value
+
+
+class Summary(Metric):
+    TYPE = "summary"
+
+    def observe(self, value: float, **labels):
+        labels = self._get_labels(labels)
+        self._add(1, labels, "_count")
+        self._add(value, labels, "_sum")
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in Metric.registry.values():
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+        for name, labels, value in metric.collect():
+            if labels:
+                name += (
+                    "{"
+                    + ",".join(f'{key}="{label_value}"' for key, label_value in labels)
+                    + "}"
+                )
+
+            lines.append(f"{name} {value:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int) -> ThreadingHTTPServer:
+    """
+    Serve `render` on `port` in a daemon thread, for processes without the API
+    like the workers run as management commands.
+    """
+    server = ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="MetricsServer", daemon=True
+    ).start()
+    return server
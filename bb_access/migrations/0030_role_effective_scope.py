@@ -0,0 +1,50 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_role_effective_scopes(apps, schema_editor):
+    Role = apps.get_model('bb_access', 'Role')
+    RoleEffectiveScope = apps.get_model('bb_access', 'RoleEffectiveScope')
+
+    effective_scopes = []
+    for role in Role.objects.all():
+        visited = {role.id}
+        pending = [role]
+        scope_ids = set()
+        while pending:
+            current = pending.pop()
+            scope_ids.update(current.scopes.values_list('id', flat=True))
+            for included_role in current.included_roles.exclude(id__in=visited):
+                visited.add(included_role.id)
+                pending.append(included_role)
+
+        effective_scopes.extend(
+            RoleEffectiveScope(role_id=role.id, scope_id=scope_id) for scope_id in scope_ids
+        )
+
+    RoleEffectiveScope.objects.bulk_create(effective_scopes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0029_user_authority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoleEffectiveScope',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('role', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_scopes', to='bb_access.role')),
+                ('scope', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_roles', to='bb_access.scope')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roleeffectivescope',
+            constraint=models.UniqueConstraint(fields=('role', 'scope'), name='role_effective_scope_unique'),
+        ),
+        migrations.RunPython(fill_role_effective_scopes, migrations.RunPython.noop),
+    ]
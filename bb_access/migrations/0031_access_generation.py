@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0030_role_effective_scope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessGeneration',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('generation', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
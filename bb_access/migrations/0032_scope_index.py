@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+def set_scope_indexes(apps, schema_editor):
+    Scope = apps.get_model('bb_access', 'Scope')
+
+    scopes = Scope.objects.order_by('service', 'resource', 'action', 'selector')
+    for index, scope in enumerate(scopes):
+        scope.index = index
+        scope.save(update_fields=['index'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0031_access_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scope',
+            name='index',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(set_scope_indexes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='scope',
+            name='index',
+            field=models.PositiveIntegerField(editable=False, help_text='Stable position of the scope in scope bitsets, never reused', unique=True),
+        ),
+    ]
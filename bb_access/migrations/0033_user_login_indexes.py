@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0032_scope_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['tenant', 'status', 'email'], name='bb_access_u_tenant__c5950b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['tenant', 'status', 'number'], name='bb_access_u_tenant__bf048e_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0033_user_login_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userotp',
+            name='lookup',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='userotp',
+            index=models.Index(fields=['user', 'lookup'], name='bb_access_u_user_id_9cd1af_idx'),
+        ),
+    ]
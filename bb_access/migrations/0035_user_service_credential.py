@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0034_userotp_lookup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='service_credential',
+            field=models.CharField(blank=True, editable=False, max_length=128, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0035_user_service_credential'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLoginEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('logged_in_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
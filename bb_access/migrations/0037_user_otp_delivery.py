@@ -0,0 +1,29 @@
+# Generated by Django 4.1.13 on 2026-10-18 10:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bb_access', '0036_user_login_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserOTPDelivery',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('medium', models.CharField(max_length=16)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('receiver', models.CharField(max_length=320)),
+                ('body', models.TextField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('otp', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='bb_access.userotp')),
+            ],
+        ),
+    ]
@@ -1,4 +1,14 @@
+from .generation import AccessGeneration, access_generation_changed
 from .tenant import Tenant, TenantCountry
 from .scope import Scope
-from .role import Role
-from .user import User, UserToken, UserAccessToken, UserOTP, UserFlag
+from .role import Role, RoleEffectiveScope
+from .user import (
+    User,
+    UserToken,
+    UserAccessToken,
+    UserOTP,
+    UserOTPDelivery,
+    UserFlag,
+    UserLoginEvent,
+    user_tokens_revoked,
+)
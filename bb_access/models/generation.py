@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+from bb_access.transaction import on_commit_once
+
+
+access_generation_changed = Signal()
+
+
+class AccessGeneration(models.Model):
+    """
+    Single row counting the changes of the role and scope graph. Everything
+    caching parts of the graph is keyed by the current generation.
+    """
+
+    ID = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=ID, editable=False)
+    generation: int = models.BigIntegerField(default=0)
+    updated_at: datetime = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def get_current(cls) -> int:
+        return (
+            cls.objects.filter(id=cls.ID).values_list("generation", flat=True).first()
+            or 0
+        )
+
+    @classmethod
+    def _bump(cls):
+        updated = cls.objects.filter(id=cls.ID).update(
+            generation=models.F("generation") + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(id=cls.ID, defaults={"generation": 1})
+
+        access_generation_changed.send(
+            sender=cls, generation=cls.get_current(), is_remote=False
+        )
+
+    @classmethod
+    def bump(cls):
+        """
+        Increment the generation once the current transaction is committed.
+        Multiple bumps within the same transaction are merged into one.
+        """
+        on_commit_once(f"{cls.__name__}.bump", cls._bump)
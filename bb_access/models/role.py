@@ -1,9 +1,15 @@
-from typing import List, Optional, Set
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
 
-from django.db import models
+from django.db import models, connection
+from django.db.transaction import atomic
 from djutils.crypt import random_string_generator
 
-from . import Scope
+from bb_access.transaction import on_commit_once
+from . import AccessGeneration, Scope
+
+
+_RECURSIVE_QUERY_VENDORS = ("postgresql", "cockroachdb")
 
 
 def _default_group_id():
@@ -30,38 +36,95 @@ class Role(models.Model):
     def __str__(self) -> str:
         return f"{self.name} ({self.id})"
 
-    def get_scopes(
-        self, include_critical: bool = True, exclude_roles: Optional[set] = None
-    ) -> Set[Scope]:
-        scopes = set()
-        if not exclude_roles:
-            exclude_roles = set()
-
-        exclude_roles.add(self.id)
+    def get_scopes(self, include_critical: bool = True) -> Set[Scope]:
+        filters = models.Q(
+            effective_roles__role=self, is_active=True, is_internal=False
+        )
+        if not include_critical:
+            filters &= models.Q(is_critical=False)
 
-        def get_scopes():
-            filters = models.Q(is_active=True, is_internal=False)
-            if not include_critical:
-                filters &= models.Q(is_critical=False)
+        return set(Scope.objects.filter(filters))
 
-            return list(self.scopes.filter(filters))
-
-        scopes.update(get_scopes())
-
-        def get_roles():
-            return list(self.included_roles.exclude(id__in=exclude_roles))
+    def get_included_roles(self) -> List["Role"]:
+        return list(self.included_roles.all())
 
-        for role in get_roles():
-            scopes.update(
-                role.get_scopes(
-                    include_critical=include_critical, exclude_roles=exclude_roles
+    def get_roles(self) -> List["Role"]:
+        """
+        Get this role followed by all (transitively) included roles, depth-first
+        """
+        if connection.vendor in _RECURSIVE_QUERY_VENDORS:
+            return self._get_roles_recursive_query()
+
+        return self._get_roles_walk()
+
+    def _get_roles_recursive_query(self) -> List["Role"]:
+        """
+        Load all included roles with a recursive query. `UNION` expands every
+        role only once, even if it is included over several paths, the
+        depth-first order is established afterwards from the included role ids.
+        """
+        quote_name = connection.ops.quote_name
+        through = Role.included_roles.through
+        through_table = quote_name(through._meta.db_table)
+        from_column = quote_name(through._meta.get_field("from_role").column)
+        to_column = quote_name(through._meta.get_field("to_role").column)
+
+        roles: Dict[str, Role] = {
+            role.id: role
+            for role in Role.objects.raw(
+                f"""
+                WITH RECURSIVE included (id) AS (
+                    SELECT CAST(%s AS TEXT)
+                    UNION
+                    SELECT CAST(edge.{to_column} AS TEXT)
+                    FROM included
+                    JOIN {through_table} edge ON edge.{from_column} = included.id
                 )
+                SELECT
+                    included_role.*,
+                    ARRAY(
+                        SELECT CAST(edge.{to_column} AS TEXT)
+                        FROM {through_table} edge
+                        WHERE edge.{from_column} = included_role.id
+                        ORDER BY edge.{to_column}
+                    ) AS included_role_ids
+                FROM {quote_name(Role._meta.db_table)} included_role
+                JOIN included ON included.id = included_role.id
+                """,
+                [self.id],
             )
+        }
+
+        ordered_roles: Dict[str, Role] = {}
+        pending = [self.id]
+        while pending:
+            role_id = pending.pop()
+            if role_id in ordered_roles:
+                continue
+
+            ordered_roles[role_id] = roles[role_id]
+            pending.extend(reversed(roles[role_id].included_role_ids))
+
+        return list(ordered_roles.values())
+
+    def _get_roles_walk(self) -> List["Role"]:
+        def _get_roles(
+            role: Role, _excluded_role_ids: Optional[Set[str]] = None
+        ) -> Dict[Role, None]:
+            roles = {role: None}
+            if not _excluded_role_ids:
+                _excluded_role_ids = set()
+            _excluded_role_ids.add(role.id)
+
+            for included_role in role.included_roles.exclude(id__in=_excluded_role_ids):
+                _excluded_role_ids.add(included_role.id)
+                roles.update(
+                    _get_roles(included_role, _excluded_role_ids=_excluded_role_ids)
+                )
 
-        return scopes
+            return roles
 
-    def get_included_roles(self) -> List["Role"]:
-        return list(self.included_roles.all())
+        return list(_get_roles(self).keys())
 
     class Meta:
         constraints = [
@@ -71,3 +134,91 @@ class Role(models.Model):
                 condition=models.Q(is_default=True),
             ),
         ]
+
+
+class RoleEffectiveScope(models.Model):
+    """
+    Materialized scopes of a role including the scopes of all (transitively)
+    included roles. Maintained by `refresh`, do not modify directly.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    role: Role = models.ForeignKey(
+        Role, on_delete=models.CASCADE, related_name="effective_scopes"
+    )
+    scope: Scope = models.ForeignKey(
+        Scope, on_delete=models.CASCADE, related_name="effective_roles"
+    )
+
+    @classmethod
+    def _get_expected(cls) -> Set[Tuple[str, str]]:
+        included_role_ids: Dict[str, Set[str]] = defaultdict(set)
+        for from_role_id, to_role_id in Role.included_roles.through.objects.values_list(
+            "from_role_id", "to_role_id"
+        ):
+            included_role_ids[from_role_id].add(to_role_id)
+
+        scope_ids: Dict[str, Set[str]] = defaultdict(set)
+        for role_id, scope_id in Role.scopes.through.objects.values_list(
+            "role_id", "scope_id"
+        ):
+            scope_ids[role_id].add(scope_id)
+
+        expected = set()
+        for role_id in Role.objects.values_list("id", flat=True):
+            visited = {role_id}
+            pending = [role_id]
+            while pending:
+                current_role_id = pending.pop()
+                expected.update(
+                    (role_id, scope_id) for scope_id in scope_ids[current_role_id]
+                )
+                for included_role_id in included_role_ids[current_role_id] - visited:
+                    visited.add(included_role_id)
+                    pending.append(included_role_id)
+
+        return expected
+
+    @classmethod
+    @atomic
+    def refresh(cls):
+        # concurrent refreshes would insert the same rows
+        AccessGeneration.objects.select_for_update().get_or_create(
+            id=AccessGeneration.ID
+        )
+        expected = cls._get_expected()
+        existing = set(cls.objects.values_list("role_id", "scope_id"))
+
+        stale: Dict[str, List[str]] = defaultdict(list)
+        for role_id, scope_id in existing - expected:
+            stale[role_id].append(scope_id)
+
+        for role_id, scope_ids in stale.items():
+            cls.objects.filter(role_id=role_id, scope_id__in=scope_ids).delete()
+
+        cls.objects.bulk_create(
+            [
+                cls(role_id=role_id, scope_id=scope_id)
+                for role_id, scope_id in expected - existing
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def schedule_refresh(cls):
+        """
+        Refresh once the current transaction is committed. Multiple refreshes
+        within the same transaction are merged into one.
+        """
+        on_commit_once(f"{cls.__name__}.refresh", cls.refresh)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=(
+                    "role",
+                    "scope",
+                ),
+                name="role_effective_scope_unique",
+            ),
+        ]
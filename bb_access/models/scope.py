@@ -1,9 +1,12 @@
 from typing import List
 
 from django.db import models
+from django.db.transaction import atomic
 from django.utils.functional import cached_property
 from djutils.crypt import random_string_generator
 
+from . import AccessGeneration
+
 
 def _default_scope_id():
     return random_string_generator(size=32)
@@ -20,6 +23,11 @@ class Scope(models.Model):
     is_active: bool = models.BooleanField(default=True)
     is_internal: bool = models.BooleanField(default=False)
     is_critical: bool = models.BooleanField(default=False)
+    index: int = models.PositiveIntegerField(
+        unique=True,
+        editable=False,
+        help_text="Stable position of the scope in scope bitsets, never reused",
+    )
 
     @cached_property
     def keys(self) -> List[str]:
@@ -42,6 +50,18 @@ class Scope(models.Model):
     def __str__(self):
         return self.code
 
+    @atomic
+    def save(self, *args, **kwargs):
+        if self.index is None:
+            # Serialize index assignment of concurrent saves on the generation row
+            AccessGeneration.objects.select_for_update().get_or_create(
+                id=AccessGeneration.ID
+            )
+            max_index = Scope.objects.aggregate(models.Max("index"))["index__max"]
+            self.index = 0 if max_index is None else max_index + 1
+
+        return super().save(*args, **kwargs)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
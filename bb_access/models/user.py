@@ -1,24 +1,40 @@
 import string
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Set, Tuple, Optional, Union
 from datetime import timedelta
 
-from jose import jwt
 from django.db import models
 from django.db.transaction import atomic
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
-from django.contrib.auth.hashers import make_password, check_password
+from django.dispatch import Signal
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.contrib.auth.signals import user_logged_in
 from django.utils import timezone
+from django.utils.crypto import get_random_string, salted_hmac
+from django.utils.functional import cached_property
 from dirtyfields import DirtyFieldsMixin
 from djpykafka.models import KafkaPublishMixin
 from djutils.crypt import random_string_generator
+from djutils.transaction import on_transaction_complete
 from djdantic.schemas import Access, Error, AccessScope
 from djfapi.exceptions import AuthError, ConstraintError
 from djdantic import context
 
-from . import Scope, Role, Tenant
+from bb_access.auth.bitset import to_bits, iter_indexes, encode_bits
+from bb_access.auth.hashing import (
+    check_password,
+    check_keyed_digest,
+    is_keyed_digest,
+    make_keyed_digest,
+)
+from bb_access.auth.signing import get_signer
+from . import AccessGeneration, Scope, Role, Tenant
+
+
+user_tokens_revoked = Signal()
 
 
 def _default_user_id():
@@ -45,6 +61,37 @@ def _default_user_flag_id():
     return random_string_generator(size=72)
 
 
+@dataclass
+class UserAuthContext:
+    """
+    Roles and effective scopes of a user, resolved once and shared by everything
+    issuing tokens for the user within the same request.
+    """
+
+    tenant_id: str
+    roles: List[Role]
+    scopes: Dict[int, Scope]
+    codes: Dict[int, str]
+    scope_bits: int
+    critical_scope_bits: int
+    generation: Optional[int] = None
+
+    def get_scope_bits(self, include_critical: bool = True) -> int:
+        if include_critical:
+            return self.scope_bits | self.critical_scope_bits
+
+        return self.scope_bits
+
+    def get_scopes(self, include_critical: bool = True) -> Set[Scope]:
+        return {
+            self.scopes[index]
+            for index in iter_indexes(self.get_scope_bits(include_critical))
+        }
+
+    def get_audiences(self, scope_bits: int) -> List[str]:
+        return [self.codes[index] for index in iter_indexes(scope_bits)]
+
+
 class UserManager(BaseUserManager):
     @atomic
     def _create_user(self, email, password, **extra_fields):
@@ -81,6 +128,36 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    def get_for_login(self, tenant_id: str, login: str) -> "User":
+        """
+        Active user of the tenant by email or, if no email matches, by number,
+        loaded in a single query.
+        """
+        email = login.lower()
+        users = list(
+            self.filter(
+                models.Q(email=email) | models.Q(number=login),
+                status=User.Status.ACTIVE,
+                tenant_id=tenant_id,
+            )
+        )
+        for user in users:
+            if user.email == email:
+                return user
+
+        if not users:
+            raise self.model.DoesNotExist(
+                "%s matching query does not exist." % self.model._meta.object_name
+            )
+
+        if len(users) > 1:
+            raise self.model.MultipleObjectsReturned(
+                "get_for_login() returned more than one %s"
+                % self.model._meta.object_name
+            )
+
+        return users[0]
+
 
 class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
     class Status(models.TextChoices):
@@ -101,6 +178,7 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
         OTP_PIN = "OTP_PIN"
         OTP_TOKEN = "OTP_TOKEN"
         TOKEN = "TOKEN"
+        SERVICE_CREDENTIAL = "SERVICE_CREDENTIAL"
 
     class UserAuthority(models.TextChoices):
         BIZBERRY = "BIZBERRY"
@@ -115,6 +193,9 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
     email: str = models.CharField(max_length=320, unique=False, db_index=True)
     number: Optional[str] = models.CharField(max_length=16, null=True, blank=True)
     password: str = models.CharField(_("password"), max_length=144)
+    service_credential: Optional[str] = models.CharField(
+        max_length=128, null=True, blank=True, editable=False
+    )
     status: Status = models.CharField(
         max_length=16, choices=Status.choices, default=Status.ACTIVE
     )
@@ -144,6 +225,10 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
         "language",
     ]
 
+    USER_TOKEN_VALIDITY = timedelta(days=365)
+    TRANSACTION_TOKEN_VALIDITY = timedelta(minutes=5)
+    SERVICE_CREDENTIAL_PREFIX = "bbsc_"
+
     @property
     def username(self) -> str:
         return self.email
@@ -170,41 +255,111 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
     @atomic
     def set_password(self, raw_password: Optional[str]) -> None:
         res = super().set_password(raw_password)
-        token: UserToken
-        for token in self.tokens.filter(is_active=True):
-            token.is_active = False
-            token.save()
-
+        self._revoke_tokens()
         return res
 
-    def get_role(self):
-        return self.role or Role.objects.get(is_default=True)
+    @atomic
+    def set_password_hash(self, encoded: str, raw_password: Optional[str] = None):
+        """
+        Set a password hashed beforehand by `make_password`, which allows to hash
+        it before a transaction is opened.
+        """
+        self.password = encoded
+        self._password = raw_password
+        self._revoke_tokens()
 
-    def get_scopes(self, include_critical: bool = True) -> Set[Scope]:
-        role = self.get_role()
+    def _revoke_tokens(self):
+        token_ids = list(
+            self.tokens.filter(is_active=True).values_list("id", flat=True)
+        )
+        if token_ids:
+            UserToken.objects.filter(id__in=token_ids).update(is_active=False)
+            UserToken.revoked(token_ids)
 
-        return role.get_scopes(include_critical=include_critical)
+    def check_password(self, raw_password: Optional[str]) -> bool:
+        def setter(raw_password: str):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
+
+    @atomic
+    def create_service_credential(self) -> str:
+        """
+        Issue a new random credential for a `SERVICE` user, replacing the current
+        one. Only a keyed digest is stored, which is cheap to check at login.
+        User tokens issued so far are revoked, like on a password change.
+        """
+        credential = self.SERVICE_CREDENTIAL_PREFIX + get_random_string(64)
+        self.service_credential = make_keyed_digest(
+            credential, key_salt="bb_access.User.service_credential"
+        )
+        self.save(update_fields=["service_credential"])
+        self._revoke_tokens()
+        return credential
+
+    @property
+    def has_service_credential(self) -> bool:
+        return self.type == self.Type.SERVICE and bool(self.service_credential)
+
+    def check_service_credential(self, credential: Optional[str]) -> bool:
+        return self.type == self.Type.SERVICE and check_keyed_digest(
+            credential,
+            self.service_credential,
+            key_salt="bb_access.User.service_credential",
+        )
+
+    def get_role(self) -> Role:
+        if settings.ACCESS_GRAPH_CACHE_ENABLED:
+            from bb_access.auth.graph import get_graph
+
+            graph = get_graph()
+            role = graph.roles.get(self.role_id) if self.role_id else graph.default_role
+            if role:
+                return role
+
+        return self.role or Role.objects.get(is_default=True)
+
+    @cached_property
+    def auth_context(self) -> UserAuthContext:
+        from bb_access.auth.graph import get_graph
 
-    def get_roles(self) -> List[Role]:
         role = self.get_role()
+        graph = settings.ACCESS_GRAPH_CACHE_ENABLED and get_graph()
+        if graph and role.id in graph.roles:
+            roles = graph.get_roles(role)
+            scopes = graph.scopes
+            codes = graph.codes
+            scope_bits = graph.get_scope_bits(role)
+            critical_scope_bits = graph.critical_scope_bits
+            generation = graph.generation
 
-        def _get_roles(
-            role: Role, _excluded_role_ids: Optional[Set[id]] = None
-        ) -> Dict[Role, None]:
-            roles = {role: None}
-            if not _excluded_role_ids:
-                _excluded_role_ids = set()
-            _excluded_role_ids.add(role.id)
-
-            for included_role in role.included_roles.exclude(id__in=_excluded_role_ids):
-                _excluded_role_ids.add(included_role.id)
-                roles.update(
-                    _get_roles(included_role, _excluded_role_ids=_excluded_role_ids)
-                )
+        else:
+            roles = role.get_roles()
+            scopes = {scope.index: scope for scope in role.get_scopes()}
+            codes = {index: scope.code for index, scope in scopes.items()}
+            scope_bits = to_bits(scopes.keys())
+            critical_scope_bits = to_bits(
+                index for index, scope in scopes.items() if scope.is_critical
+            )
+            generation = None
+
+        return UserAuthContext(
+            tenant_id=self.tenant_id,
+            roles=roles,
+            scopes=scopes,
+            codes=codes,
+            scope_bits=scope_bits & ~critical_scope_bits,
+            critical_scope_bits=scope_bits & critical_scope_bits,
+            generation=generation,
+        )
 
-            return roles
+    def get_scopes(self, include_critical: bool = True) -> Set[Scope]:
+        return self.auth_context.get_scopes(include_critical=include_critical)
 
-        return list(_get_roles(role).keys())
+    def get_roles(self) -> List[Role]:
+        return list(self.auth_context.roles)
 
     def _create_token(
         self,
@@ -214,6 +369,7 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
         include_critical: bool = False,
         store_in_db: bool = False,
         token_type: Optional["UserToken.Types"] = None,
+        extra_claims: Optional[Dict] = None,
     ) -> Tuple[str, str]:
         time_now = timezone.now()
         time_expire = time_now + validity
@@ -226,57 +382,143 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
             "nbf": time_now,
             "exp": time_expire,
             "sub": self.id,
-            "ten": self.tenant.id,
+            "ten": self.auth_context.tenant_id,
             "crt": include_critical,
             "aud": audiences,
-            "rls": [role.name for role in self.get_roles()],
+            "rls": [role.name for role in self.auth_context.roles],
             "jti": token_id,
+            **(extra_claims or {}),
         }
 
-        token = jwt.encode(
-            claims=claims,
-            key=settings.JWT_PRIVATE_KEY,
-            algorithm="ES512",
-        )
+        token = get_signer().sign(claims)
 
         if store_in_db:
             self.tokens.create(id=token_id, type=token_type)
 
         return token, token_id
 
-    def create_transaction_token(
-        self, include_critical: bool = False, used_token: Optional[Access] = None
+    def _create_transaction_token(
+        self,
+        *,
+        scope_bits: int,
+        include_critical: bool,
+        compact: bool,
+        extra_claims: Optional[Dict] = None,
     ) -> str:
-        audiences: List[str] = [
-            scope.code for scope in self.get_scopes(include_critical=include_critical)
-        ]
+        """
+        Create a transaction token for the given scopes. Compact tokens carry the
+        scopes as bitset (`sbs`) of the scope catalog generation `scv` instead of
+        listing all scope codes in `aud`, see `bb_access.utils.JWTToken`.
+        """
+        audiences: List[str] = []
+        extra_claims = dict(extra_claims or {})
+        if compact:
+            generation = self.auth_context.generation
+            extra_claims["sbs"] = encode_bits(scope_bits)
+            extra_claims["scv"] = (
+                AccessGeneration.get_current() if generation is None else generation
+            )
+
+        else:
+            audiences = self.auth_context.get_audiences(scope_bits)
+
+        token, _ = self._create_token(
+            validity=self.TRANSACTION_TOKEN_VALIDITY,
+            audiences=audiences,
+            include_critical=include_critical,
+            extra_claims=extra_claims,
+        )
 
+        return token
+
+    def _check_user_token(self, id: str):
+        """
+        Check that the user token is active. With the revocation filter enabled,
+        the database is only asked for tokens the filter cannot rule out.
+        """
+        if settings.USER_TOKEN_REVOCATION_FILTER_ENABLED:
+            from bb_access.auth.revocation import is_revoked
+
+            revoked = is_revoked(id)
+            if revoked:
+                raise AuthError(detail=Error(code="invalid_user_token:not_active"))
+
+            if revoked is False:
+                return
+
+        try:
+            user_token = self.tokens.get(id=id, type=UserToken.Types.USER)
+
+        except UserToken.DoesNotExist as error:
+            raise AuthError(detail=Error(code="invalid_user_token")) from error
+
+        if not user_token.is_active:
+            raise AuthError(detail=Error(code="invalid_user_token:not_active"))
+
+    def check_transaction_token_access(self, used_token: Optional[Access] = None):
+        """
+        Check that the user, and the user token used, may still get transaction
+        tokens.
+        """
         if self.status == self.Status.TERMINATED:
             raise AuthError(detail=Error(code="user_terminated"))
 
         if used_token:
-            try:
-                user_token = self.tokens.get(
-                    id=used_token.token.jti, type=UserToken.Types.USER
-                )
-
-            except UserToken.DoesNotExist as error:
-                raise AuthError(detail=Error(code="invalid_user_token")) from error
+            self._check_user_token(used_token.token.jti)
 
-            if not user_token.is_active:
-                raise AuthError(detail=Error(code="invalid_user_token:not_active"))
+    def create_transaction_token(
+        self,
+        include_critical: bool = False,
+        used_token: Optional[Access] = None,
+        compact: bool = False,
+    ) -> str:
+        self.check_transaction_token_access(used_token)
 
-        token, _ = self._create_token(
-            validity=timedelta(minutes=5),
-            audiences=audiences,
+        return self._create_transaction_token(
+            scope_bits=self.auth_context.get_scope_bits(
+                include_critical=include_critical
+            ),
             include_critical=include_critical,
+            compact=compact,
         )
 
-        return token
+    @classmethod
+    def create_impersonation_tokens(
+        cls, user_ids: List[str], *, actor: "User", compact: bool = False
+    ) -> Dict[str, str]:
+        """
+        Create transaction tokens without critical scopes for the active users of
+        the actor's tenant. The tokens name the actor in the `act` claim.
+        """
+        return {
+            user.id: user._create_transaction_token(
+                scope_bits=user.auth_context.get_scope_bits(include_critical=False),
+                include_critical=False,
+                compact=compact,
+                extra_claims={"act": {"sub": actor.id}},
+            )
+            for user in cls.objects.select_related("role").filter(
+                id__in=user_ids, tenant_id=actor.tenant_id, status=cls.Status.ACTIVE
+            )
+        }
+
+    def logged_in(self):
+        """
+        Apply the side effects of a successful login: with `LOGIN_OUTBOX_ENABLED`
+        it is recorded as `UserLoginEvent` for `relay_login_events`, otherwise
+        `user_logged_in` is sent right away.
+        """
+        if settings.LOGIN_OUTBOX_ENABLED:
+            UserLoginEvent.objects.create(user=self)
+
+        else:
+            user_logged_in.send(
+                sender=self.__class__, instance=self, user=self, request=None
+            )
 
     def create_user_token(self) -> str:
         token, token_id = self._create_token(
-            validity=timedelta(days=365),
+            validity=self.USER_TOKEN_VALIDITY,
             audiences=["access.users.request_transaction_token"],
             store_in_db=True,
             token_type=UserToken.Types.USER,
@@ -372,6 +614,23 @@ class User(DirtyFieldsMixin, KafkaPublishMixin, AbstractUser):
             ),
         ]
 
+        indexes = [
+            models.Index(
+                fields=(
+                    "tenant",
+                    "status",
+                    "email",
+                )
+            ),
+            models.Index(
+                fields=(
+                    "tenant",
+                    "status",
+                    "number",
+                )
+            ),
+        ]
+
 
 class UserToken(models.Model):
     class Types(models.TextChoices):
@@ -387,6 +646,18 @@ class UserToken(models.Model):
     create_date: datetime = models.DateTimeField(auto_now_add=True)
     is_active: bool = models.BooleanField(default=True)
 
+    @classmethod
+    def _send_revoked(cls, ids: List[str]):
+        user_tokens_revoked.send(sender=cls, ids=ids, is_remote=False)
+
+    @classmethod
+    def revoked(cls, ids: List[str]):
+        """
+        Announce revoked tokens once the current transaction is committed.
+        """
+        if ids:
+            on_transaction_complete()(cls._send_revoked)(list(ids))
+
 
 class UserAccessToken(models.Model):
     id = models.CharField(
@@ -422,22 +693,46 @@ class UserAccessToken(models.Model):
 
         return set(self.scopes.filter(filters))
 
-    def create_transaction_token(self, include_critical: bool = False) -> str:
-        scopes: Set[Scope] = self.user.get_scopes()
-        if self.scopes.count():
-            scopes = scopes.intersection(
-                self.get_scopes(include_critical=include_critical)
-            )
-
-        audiences: List[str] = [scope.code for scope in scopes]
+    def get_scope_bits(self) -> int:
+        return to_bits(scope.index for scope in self.scopes.all())
 
-        token, _ = self.user._create_token(
-            validity=timedelta(minutes=5),
-            audiences=audiences,
-            include_critical=include_critical,
+    def create_transaction_token(
+        self, include_critical: bool = False, compact: bool = False
+    ) -> str:
+        auth_context = self.user.auth_context
+        scope_bits = auth_context.get_scope_bits()
+        restricted_scope_bits = self.get_scope_bits()
+        if restricted_scope_bits:
+            scope_bits &= restricted_scope_bits
+            if not include_critical:
+                scope_bits &= ~auth_context.critical_scope_bits
+
+        return self.user._create_transaction_token(
+            scope_bits=scope_bits, include_critical=include_critical, compact=compact
         )
 
-        return token
+    @classmethod
+    def create_transaction_tokens(
+        cls, tokens: List[str], *, include_critical: bool = False, compact: bool = False
+    ) -> Dict[str, Tuple[str, str]]:
+        """
+        Create transaction tokens for all active access tokens of `tokens`,
+        loading the access tokens, their users and restrictions in bulk.
+        Returns the user id and transaction token by access token.
+        """
+        return {
+            access_token.token: (
+                access_token.user_id,
+                access_token.create_transaction_token(
+                    include_critical=include_critical, compact=compact
+                ),
+            )
+            for access_token in cls.objects.select_related("user__role")
+            .prefetch_related(
+                models.Prefetch("scopes", queryset=Scope.objects.only("id", "index"))
+            )
+            .filter(token__in=tokens, is_active=True)
+        }
 
 
 class UserOTP(KafkaPublishMixin, models.Model):
@@ -457,15 +752,31 @@ class UserOTP(KafkaPublishMixin, models.Model):
     length: int = models.IntegerField()
     used_at: datetime = models.DateTimeField(null=True, blank=True)
     value: str = models.CharField(max_length=128)
+    lookup: Optional[str] = models.CharField(max_length=64, null=True, editable=False)
     is_internal: bool = models.BooleanField(default=False)
 
+    @staticmethod
+    def get_lookup(user_id: str, value: str) -> str:
+        """
+        Keyed digest of the value per user, which finds a matching OTP by index
+        instead of checking the value of each OTP of the user.
+        """
+        return salted_hmac(
+            "bb_access.UserOTP.lookup", f"{user_id}:{value}", algorithm="sha256"
+        ).hexdigest()
+
     def set_value(self, value: str):
-        self.value = make_password(value)
+        self.value = make_keyed_digest(value, key_salt="bb_access.UserOTP.value")
+        self.lookup = self.get_lookup(self.user_id, value)
         self._value = value
         self.length = len(value)
 
     def validate(self, value):
-        return check_password(value, self.value)
+        if not is_keyed_digest(self.value):
+            # created before OTPs were stored as keyed digests
+            return check_password(value, self.value)
+
+        return check_keyed_digest(value, self.value, key_salt="bb_access.UserOTP.value")
 
     @atomic
     def save(self, *args, **kwargs):
@@ -483,6 +794,36 @@ class UserOTP(KafkaPublishMixin, models.Model):
             ),
         ]
 
+        indexes = [
+            models.Index(
+                fields=(
+                    "user",
+                    "lookup",
+                )
+            ),
+        ]
+
+
+class UserOTPDelivery(models.Model):
+    """
+    Outbox of OTP messages, sent by `deliver_otps`. The rendered body contains
+    the OTP, so a delivery is deleted as soon as it is sent or given up.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    otp: UserOTP = models.ForeignKey(
+        UserOTP, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    medium: str = models.CharField(max_length=16)
+    subject: str = models.CharField(max_length=255, blank=True)
+    receiver: str = models.CharField(max_length=320)
+    body: str = models.TextField()
+    attempts: int = models.PositiveIntegerField(default=0)
+    next_attempt_at: datetime = models.DateTimeField(
+        default=timezone.now, db_index=True
+    )
+    last_error: Optional[str] = models.TextField(null=True, blank=True)
+
 
 class UserFlag(models.Model):
     id = models.CharField(
@@ -502,3 +843,16 @@ class UserFlag(models.Model):
                 name="user_flag_key_unique",
             ),
         ]
+
+
+class UserLoginEvent(models.Model):
+    """
+    Outbox of logins. `relay_login_events` publishes them and updates
+    `last_login` of their users in batches.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user: User = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="login_events"
+    )
+    logged_in_at: datetime = models.DateTimeField(default=timezone.now)
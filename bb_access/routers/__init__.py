@@ -1 +1 @@
-from . import auth, users, roles, tenants
+from . import auth, users, roles, scopes, tenants, well_known
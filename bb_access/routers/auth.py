@@ -1,15 +1,18 @@
 from typing import Optional
 from datetime import timedelta
 
-from fastapi import APIRouter, HTTPException, status, Body, Security, Path
+from fastapi import APIRouter, HTTPException, status, Body, Security, Path, Request
 from django.db.transaction import atomic
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth import authenticate as sync_authenticate
-from django.contrib.auth.signals import user_logged_in
+from djdantic.exceptions import AccessError
 from djdantic.schemas import Access, Error
 from djfapi.exceptions import AuthError, ValidationError
 
+from bb_access.auth.hashing import make_password
+from bb_access.auth.throttling import check_login_throttle
+from bb_access.auth.transaction_cache import transaction_token_cache
 from bb_access.utils import JWTToken
 from bb_access.models import User, UserAccessToken, UserOTP
 from bb_access.schemas import request, response
@@ -22,28 +25,24 @@ user_token = JWTToken(
     auto_error=False,
 )
 transaction_token = JWTToken(scheme_name="Transaction Token")
+optional_transaction_token = JWTToken(
+    scheme_name="Transaction Token",
+    auto_error=False,
+)
 
 
 def authenticate(*args, **kwargs) -> Optional[User]:
     user = sync_authenticate(*args, **kwargs)
     if user:
-        user_logged_in.send(
-            sender=user.__class__, instance=user, user=user, request=None
-        )
+        user.logged_in()
 
     return user
 
 
-def access_user(access: Optional[Access] = Security(user_token)) -> Access:
-    if not access:
-        return
-
-    access.user = User.objects.get(id=access.user_id)
+def _get_access_user(access: Access) -> User:
+    return User.objects.select_related("role").get(id=access.user_id)
 
-    return access
 
-
-@atomic
 def _reset_password(
     tenant_id: str,
     *,
@@ -57,7 +56,7 @@ def _reset_password(
 
     otp: UserOTP
     if otp_id:
-        otp = UserOTP.objects.get(
+        otp = UserOTP.objects.select_related("user").get(
             id=otp_id,
             user__tenant_id=tenant_id,
             used_at__isnull=True,
@@ -74,21 +73,40 @@ def _reset_password(
     if not otp.validate(value):
         return None
 
-    otp.used_at = timezone.now()
-    otp.save(
-        update_fields=[
-            "used_at",
-        ]
-    )
-    user.set_password(password)
-    user.save()
-    user_logged_in.send(sender=user.__class__, instance=user, user=user, request=None)
+    # hash before the transaction, so it holds no locks while hashing
+    encoded_password = make_password(password)
+    with atomic():
+        time_now = timezone.now()
+        if not UserOTP.objects.filter(id=otp.id, used_at__isnull=True).update(
+            used_at=time_now, updated_at=time_now
+        ):
+            # used by a concurrent request
+            return None
+
+        user.set_password_hash(encoded_password, password)
+        user.save()
+
+    user.logged_in()
 
     return user
 
 
 @router.post("/user", response_model=response.AuthUser)
-def get_user_token(credentials: request.AuthUser = Body(...)):
+def get_user_token(req: Request, credentials: request.AuthUser = Body(...)):
+    login = (
+        credentials.email or credentials.id or (credentials.otp and credentials.otp.id)
+    )
+    # the account bucket of a service credential login is only skipped once the
+    # user is known to have one
+    is_service_credential = not credentials.otp and (
+        credentials.password or ""
+    ).startswith(User.SERVICE_CREDENTIAL_PREFIX)
+    check_login_throttle(
+        req.client and req.client.host,
+        tenant_id=credentials.tenant.id,
+        login=login,
+        is_service_credential=is_service_credential,
+    )
     _user = None
     if credentials.otp:
         user: User = _reset_password(
@@ -100,19 +118,9 @@ def get_user_token(credentials: request.AuthUser = Body(...)):
 
     elif credentials.email or credentials.id:
         if credentials.email:
-            try:
-                _user: User = User.objects.get(
-                    status=User.Status.ACTIVE,
-                    tenant_id=credentials.tenant.id,
-                    email=credentials.email.lower(),
-                )
-
-            except User.DoesNotExist:
-                _user: User = User.objects.get(
-                    status=User.Status.ACTIVE,
-                    tenant_id=credentials.tenant.id,
-                    number=credentials.email,
-                )
+            _user: User = User.objects.get_for_login(
+                credentials.tenant.id, credentials.email
+            )
 
         elif credentials.id:
             _user: User = User.objects.get(
@@ -124,7 +132,10 @@ def get_user_token(credentials: request.AuthUser = Body(...)):
         else:
             raise NotImplementedError
 
-        user: User = authenticate(id=_user.id, password=credentials.password)
+        if is_service_credential and not _user.has_service_credential:
+            check_login_throttle(None, tenant_id=credentials.tenant.id, login=login)
+
+        user: User = authenticate(user=_user, password=credentials.password)
 
     else:
         raise NotImplementedError
@@ -150,25 +161,30 @@ def get_user_token(credentials: request.AuthUser = Body(...)):
 @router.post("/transaction", response_model=response.AuthTransaction)
 def get_transaction_token(
     access: Optional[Access] = Security(
-        access_user, scopes=["access.users.request_transaction_token"]
+        user_token, scopes=["access.users.request_transaction_token"]
     ),
     credentials: Optional[request.AuthTransaction] = Body(default=None),
 ):
     """
     Scopes: `access.users.request_transaction_token`
     """
-    transaction_token = None
     include_critical = credentials and credentials.include_critical or False
+    compact = credentials and credentials.compact or False
 
+    # credentials are checked before a cached transaction token is handed out,
+    # so tokens revoked or deactivated meanwhile get no further tokens
     if credentials and credentials.access_token:
-        user_accesstoken: UserAccessToken = UserAccessToken.objects.get(
-            token=credentials.access_token, is_active=True
-        )
-        transaction_token = user_accesstoken.create_transaction_token(
-            include_critical=include_critical
-        )
+        credential = credentials.access_token
+        user_accesstoken: UserAccessToken = UserAccessToken.objects.select_related(
+            "user__role"
+        ).get(token=credentials.access_token, is_active=True)
+
+        def create_transaction_token() -> str:
+            return user_accesstoken.create_transaction_token(
+                include_critical=include_critical, compact=compact
+            )
 
-    elif access and access.user:
+    elif access:
         if include_critical and access.token.iat < timezone.now() - timedelta(
             seconds=settings.AUTH_TOKEN_CRITICAL_THRESHOLD
         ):
@@ -179,13 +195,30 @@ def get_transaction_token(
                 )
             )
 
-        transaction_token = access.user.create_transaction_token(
-            include_critical=include_critical, used_token=access
-        )
+        credential = access.token.jti
+        user = _get_access_user(access)
+        user.check_transaction_token_access(used_token=access)
+
+        def create_transaction_token() -> str:
+            return user.create_transaction_token(
+                include_critical=include_critical, compact=compact
+            )
 
     else:
         raise AuthError
 
+    if settings.TRANSACTION_TOKEN_CACHE_ENABLED:
+        transaction_token = transaction_token_cache.get_or_create(
+            transaction_token_cache.get_key(
+                credential, include_critical=include_critical, compact=compact
+            ),
+            create_transaction_token,
+            validity=User.TRANSACTION_TOKEN_VALIDITY,
+        )
+
+    else:
+        transaction_token = create_transaction_token()
+
     return response.AuthTransaction(
         token=response.AuthTransactionToken(
             transaction=transaction_token,
@@ -193,13 +226,74 @@ def get_transaction_token(
     )
 
 
+@router.post("/transactions", response_model=response.AuthTransactionBatch)
+def get_transaction_tokens(
+    access: Optional[Access] = Security(optional_transaction_token),
+    body: request.AuthTransactionBatch = Body(...),
+):
+    """
+    Issue transaction tokens for many access tokens, or for many users of the own tenant.
+
+    Scopes for `user_ids`: `access.users.impersonate.others` of a service user
+    """
+    if body.access_tokens:
+        transaction_tokens = UserAccessToken.create_transaction_tokens(
+            body.access_tokens,
+            include_critical=body.include_critical,
+            compact=body.compact,
+        )
+        tokens = []
+        for access_token in body.access_tokens:
+            user_id, transaction = transaction_tokens.get(access_token, (None, None))
+            tokens.append(
+                response.AuthTransactionBatchToken(
+                    user_id=user_id, transaction=transaction
+                )
+            )
+
+    else:
+        if not access:
+            raise AuthError
+
+        if not access.token.has_audience(["access.users.impersonate.others"]):
+            raise AccessError(detail=Error(code="required_audience_missing"))
+
+        try:
+            actor: User = User.objects.get(
+                id=access.user_id,
+                tenant_id=access.tenant_id,
+                type=User.Type.SERVICE,
+                status=User.Status.ACTIVE,
+            )
+
+        except User.DoesNotExist as error:
+            raise AccessError(detail=Error(code="service_user_required")) from error
+
+        transaction_tokens = User.create_impersonation_tokens(
+            body.user_ids, actor=actor, compact=body.compact
+        )
+        tokens = [
+            response.AuthTransactionBatchToken(
+                user_id=user_id,
+                transaction=transaction_tokens.get(user_id),
+            )
+            for user_id in body.user_ids
+        ]
+
+    return response.AuthTransactionBatch(tokens=tokens)
+
+
 @router.post("/otp", response_model=response.AuthOTP)
 def post_otp(
+    req: Request,
     body: request.AuthUserReset = Body(...),
 ):
     """
     Request a one time password (used as PIN or TOKEN)
     """
+    check_login_throttle(
+        req.client and req.client.host, tenant_id=body.tenant.id, login=body.email
+    )
     user: User = User.objects.get(
         status=User.Status.ACTIVE, email=body.email.lower(), tenant_id=body.tenant.id
     )
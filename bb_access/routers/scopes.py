@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Request, Response, status
+from django.conf import settings
+
+from bb_access import models
+from bb_access.schemas import response
+
+
+router = APIRouter()
+
+
+def _get_catalog_etag(generation: int) -> str:
+    return f'"scopes-{generation}"'
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+
+    return any(
+        tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(",")
+    )
+
+
+@router.get("", response_model=response.ScopeCatalog)
+def get_scopes(request: Request, resp: Response):
+    """
+    Catalog of all scopes including the stable `index` referenced by compact transaction tokens.
+    Revalidate the catalog using `If-None-Match` with the returned `ETag`.
+    """
+    generation = models.AccessGeneration.get_current()
+    headers = {
+        "ETag": _get_catalog_etag(generation),
+        "Cache-Control": f"public, max-age={settings.ACCESS_SCOPE_CATALOG_MAX_AGE}",
+    }
+
+    if _is_not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    resp.headers.update(headers)
+    scopes = models.Scope.objects.order_by("index")
+
+    return response.ScopeCatalog(
+        generation=generation,
+        scopes=[response.ScopeCatalogScope.from_orm(scope) for scope in scopes],
+    )
@@ -5,7 +5,8 @@ from django.db.models import Q
 from djdantic.exceptions import AccessError
 from djdantic.utils.dict import remove_none
 from djdantic.utils.pydantic_django import transfer_to_orm, TransferAction
-from djdantic.schemas import Access
+from djdantic.schemas import Access, Error
+from djfapi.exceptions import ValidationError
 from djfapi.schemas import Pagination
 from djfapi.utils.fastapi import depends_pagination
 
@@ -262,6 +263,29 @@ def post_user_otp(
     return response.UserOTP(token=otp._value)
 
 
+@router.post(
+    "/{user_id}/service-credential", response_model=response.UserServiceCredential
+)
+def post_user_service_credential(
+    access: Access = Security(
+        access_user,
+        scopes=[
+            "access.users.create_credential.any",
+        ],
+    ),
+    user_id: str = Path(..., min_length=64, max_length=64),
+):
+    """
+    Issue a credential for a `SERVICE` user, which logs in with it instead of a
+    password. An existing credential is replaced and stops working immediately.
+    """
+    user = _get_user_by_id(access, user_id)
+    if user.type != models.User.Type.SERVICE:
+        raise ValidationError(detail=Error(code="user_type_not_service"))
+
+    return response.UserServiceCredential(credential=user.create_service_credential())
+
+
 @router.get("/{user_id}/flags", response_model=response.UserFlag)
 def get_user_flags(
     resp: Response,
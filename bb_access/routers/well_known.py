@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Response
+from django.conf import settings
+
+from bb_access.auth.keys import get_verification_keys
+from bb_access.schemas import response
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/jwks.json",
+    response_model=response.JSONWebKeySet,
+    response_model_exclude_none=True,
+)
+def get_jwks(resp: Response):
+    """
+    Public keys for verifying tokens, selected by the `kid` token header.
+    """
+    resp.headers["Cache-Control"] = f"public, max-age={settings.JWT_JWKS_MAX_AGE}"
+    return response.JSONWebKeySet(
+        keys=[key.to_jwk() for key in get_verification_keys().values()]
+    )
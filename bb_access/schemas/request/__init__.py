@@ -1,3 +1,3 @@
 from .tenant import TenantReference, TenantUpdate, TenantCountryCreate
-from .auth import AuthUser, AuthTransaction, AuthUserReset, AuthCheck
+from .auth import AuthUser, AuthTransaction, AuthTransactionBatch, AuthUserReset, AuthCheck
 from .user import UserCreate, UserUpdate, UserOTPCreate, UserFlagCreate
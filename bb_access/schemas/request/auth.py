@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field, validator, EmailStr
+from django.conf import settings
 
 from bb_access import models
 from . import TenantReference
@@ -40,12 +41,58 @@ class AuthTransaction(BaseModel):
         description="Include critical scopes in the token. To obtain a transaction token with critical scopes using an user token, the token may not be issued more than 1 hour in the past.",
     )
     access_token: Optional[str] = None
+    compact: bool = Field(
+        False,
+        description="Encode the scopes as bitset of the scope catalog (`sbs` and `scv` claims) instead of listing them in `aud`.",
+    )
 
     class Config:
         schema_extra = {
             "example": {
                 "include_critical": False,
                 "access_token": None,
+                "compact": False,
+            },
+        }
+
+
+class AuthTransactionBatch(BaseModel):
+    include_critical: bool = Field(
+        False,
+        description="Include critical scopes in the tokens of `access_tokens`. Tokens for `user_ids` never include critical scopes.",
+    )
+    access_tokens: List[str] = []
+    user_ids: List[str] = Field(
+        [],
+        description="Users of the own tenant to issue tokens for. Requires a service user with the scope `access.users.impersonate.others`.",
+    )
+    compact: bool = Field(
+        False,
+        description="Encode the scopes as bitset of the scope catalog (`sbs` and `scv` claims) instead of listing them in `aud`.",
+    )
+
+    @validator("user_ids", always=True)
+    def check_access_tokens_or_user_ids(cls, value, values):
+        if values.get("access_tokens") and value:
+            raise ValueError("multiple_values_set:access_tokens|user_ids")
+
+        if not values.get("access_tokens") and not value:
+            raise ValueError("no_values_set:access_tokens|user_ids")
+
+        if len(values.get("access_tokens") or value) > (
+            settings.AUTH_TRANSACTION_BATCH_MAX_SIZE
+        ):
+            raise ValueError("too_many_values")
+
+        return value
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "include_critical": False,
+                "access_tokens": [],
+                "user_ids": [],
+                "compact": False,
             },
         }
 
@@ -1,5 +1,24 @@
-from .auth import AuthUser, AuthUserToken, AuthTransaction, AuthTransactionToken, AuthOTP, AuthCheck
+from .auth import (
+    AuthUser,
+    AuthUserToken,
+    AuthTransaction,
+    AuthTransactionToken,
+    AuthTransactionBatch,
+    AuthTransactionBatchToken,
+    AuthOTP,
+    AuthCheck,
+    JSONWebKey,
+    JSONWebKeySet,
+)
 from .tenant import Tenant, TenantsList, TenantCountry, TenantCountriesList
-from .scope import Scope
+from .scope import Scope, ScopeCatalog, ScopeCatalogScope
 from .role import Role, RolesList
-from .user import User, UsersList, UserAccessToken, UserOTP, UserFlag, UserFlagsList
+from .user import (
+    User,
+    UsersList,
+    UserAccessToken,
+    UserOTP,
+    UserServiceCredential,
+    UserFlag,
+    UserFlagsList,
+)
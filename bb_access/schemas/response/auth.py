@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 from djdantic import Field, BaseModel
@@ -24,6 +24,15 @@ class AuthTransaction(BaseModel):
     token: AuthTransactionToken
 
 
+class AuthTransactionBatchToken(BaseModel):
+    user_id: Optional[str]
+    transaction: Optional[str]
+
+
+class AuthTransactionBatch(BaseModel):
+    tokens: List[AuthTransactionBatchToken]
+
+
 class AuthOTP(BaseModel):
     id: str = Field(orm_field=models.UserOTP.id)
     type: models.UserOTP.UserOTPType = Field(orm_field=models.UserOTP.type)
@@ -38,3 +47,17 @@ class AuthCheck(BaseModel):
         is_existing: bool
 
     email: Optional[Email]
+
+
+class JSONWebKey(BaseModel):
+    kty: str
+    crv: str
+    x: str
+    y: Optional[str]
+    kid: str
+    alg: str
+    use: str
+
+
+class JSONWebKeySet(BaseModel):
+    keys: List[JSONWebKey]
@@ -1,4 +1,7 @@
+from typing import List
+
 from pydantic import Field
+from djdantic import BaseModel
 
 from bb_access import models
 from bb_access.schemas import base
@@ -6,3 +9,16 @@ from bb_access.schemas import base
 
 class Scope(base.Scope):
     id: str = Field(min_length=32, max_length=32, orm_field=models.Scope.id)
+
+
+class ScopeCatalogScope(BaseModel, orm_model=models.Scope):
+    code: str = Field(orm_method=models.Scope.code.func)
+    index: int = Field(orm_field=models.Scope.index)
+    is_active: bool = Field(orm_field=models.Scope.is_active)
+    is_internal: bool = Field(orm_field=models.Scope.is_internal)
+    is_critical: bool = Field(orm_field=models.Scope.is_critical)
+
+
+class ScopeCatalog(BaseModel):
+    generation: int
+    scopes: List[ScopeCatalogScope]
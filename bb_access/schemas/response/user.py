@@ -35,6 +35,10 @@ class UserOTP(BaseModel):
     token: str
 
 
+class UserServiceCredential(BaseModel):
+    credential: str
+
+
 class UserFlag(base.UserFlag):
     created_at: datetime = Field(orm_field=models.UserFlag.created_at)
 
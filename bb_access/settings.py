@@ -136,7 +136,7 @@ PASSWORD_HASHERS = [
 ]
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
+    "bb_access.auth.backends.UserBackend",
     "bb_access.auth.backends.UserOTPBackend",
 ]
 
@@ -144,11 +144,42 @@ AUTH_TOKEN_LENGTH = int(os.getenv("AUTH_TOKEN_LENGTH", 64))
 AUTH_TOKEN_VALIDITY = int(os.getenv("AUTH_TOKEN_VALIDITY", 3600 * 4))
 AUTH_TOKEN_CREATE_NEW_THRESHOLD = int(os.getenv("AUTH_TOKEN_CREATE_NEW_THRESHOLD", 300))
 AUTH_TOKEN_CRITICAL_THRESHOLD = int(os.getenv("AUTH_TOKEN_CRITICAL_THRESHOLD", 3600))
+AUTH_TRANSACTION_BATCH_MAX_SIZE = int(os.getenv("AUTH_TRANSACTION_BATCH_MAX_SIZE", 500))
 
 AUTH_PIN_LENGTH = os.getenv("AUTH_PIN_LENGTH", 8)
 AUTH_PIN_VALIDITY = os.getenv("AUTH_PIN_VALIDITY", 600)
 AUTH_PIN_CREATE_NEW_THRESHOLD = int(os.getenv("AUTH_PIN_CREATE_NEW_THRESHOLD", 300))
 
+SYNC_ENDPOINT_THREADS = int(os.getenv("SYNC_ENDPOINT_THREADS", 40))
+
+HASHING_POOL_WORKERS = int(os.getenv("HASHING_POOL_WORKERS", os.cpu_count() or 1))
+HASHING_POOL_QUEUE_SIZE = int(os.getenv("HASHING_POOL_QUEUE_SIZE", 8))
+HASHING_POOL_MAX_THREAD_SHARE = float(os.getenv("HASHING_POOL_MAX_THREAD_SHARE", 0.25))
+
+LOGIN_THROTTLE_ENABLED = int(os.getenv("LOGIN_THROTTLE_ENABLED", 0))
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "MEMORY")
+LOGIN_THROTTLE_CACHE = os.getenv("LOGIN_THROTTLE_CACHE", "default")
+LOGIN_THROTTLE_MEMORY_SIZE = int(os.getenv("LOGIN_THROTTLE_MEMORY_SIZE", 100000))
+LOGIN_THROTTLE_ACCOUNT_BURST = int(os.getenv("LOGIN_THROTTLE_ACCOUNT_BURST", 10))
+LOGIN_THROTTLE_ACCOUNT_PER_MINUTE = int(
+    os.getenv("LOGIN_THROTTLE_ACCOUNT_PER_MINUTE", 5)
+)
+# all clients behind a shared NAT or proxy share the bucket of one IP
+LOGIN_THROTTLE_IP_BURST = int(os.getenv("LOGIN_THROTTLE_IP_BURST", 300))
+LOGIN_THROTTLE_IP_PER_MINUTE = int(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", 300))
+
+LOGIN_OUTBOX_ENABLED = int(os.getenv("LOGIN_OUTBOX_ENABLED", 0))
+LOGIN_OUTBOX_BATCH_SIZE = int(os.getenv("LOGIN_OUTBOX_BATCH_SIZE", 500))
+LOGIN_OUTBOX_RELAY_INTERVAL = float(os.getenv("LOGIN_OUTBOX_RELAY_INTERVAL", 1))
+
+OTP_DELIVERY_OUTBOX_ENABLED = int(os.getenv("OTP_DELIVERY_OUTBOX_ENABLED", 0))
+OTP_DELIVERY_CONCURRENCY = int(os.getenv("OTP_DELIVERY_CONCURRENCY", 4))
+OTP_DELIVERY_BATCH_SIZE = int(os.getenv("OTP_DELIVERY_BATCH_SIZE", 100))
+OTP_DELIVERY_MAX_ATTEMPTS = int(os.getenv("OTP_DELIVERY_MAX_ATTEMPTS", 5))
+OTP_DELIVERY_RETRY_DELAY = int(os.getenv("OTP_DELIVERY_RETRY_DELAY", 10))
+OTP_DELIVERY_LEASE = int(os.getenv("OTP_DELIVERY_LEASE", 120))
+OTP_DELIVERY_POLL_INTERVAL = float(os.getenv("OTP_DELIVERY_POLL_INTERVAL", 1))
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
 
@@ -197,6 +228,34 @@ LOGGING = {
 JWT_ISSUER = os.getenv("JWT_ISSUER")
 JWT_PRIVATE_KEY = os.getenv("JWT_PRIVATE_KEY")
 JWT_PUBLIC_KEY = os.getenv("JWT_PUBLIC_KEY")
+JWT_VERIFICATION_KEYS = os.getenv("JWT_VERIFICATION_KEYS", "")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "ES512")
+JWT_JWKS_MAX_AGE = int(os.getenv("JWT_JWKS_MAX_AGE", 300))
+JWT_SIGNER_BACKEND = os.getenv("JWT_SIGNER_BACKEND", "JOSE")
+JWT_SIGNER_POOL_SIZE = int(os.getenv("JWT_SIGNER_POOL_SIZE", 0))
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", 10000))
+
+ACCESS_GRAPH_CACHE_ENABLED = bool(int(os.getenv("ACCESS_GRAPH_CACHE_ENABLED", 1)))
+ACCESS_GRAPH_CACHE_CHECK_INTERVAL = float(
+    os.getenv("ACCESS_GRAPH_CACHE_CHECK_INTERVAL", 5)
+)
+TRANSACTION_TOKEN_CACHE_ENABLED = bool(
+    int(os.getenv("TRANSACTION_TOKEN_CACHE_ENABLED", 0))
+)
+TRANSACTION_TOKEN_CACHE_SIZE = int(os.getenv("TRANSACTION_TOKEN_CACHE_SIZE", 10000))
+TRANSACTION_TOKEN_CACHE_MIN_LIFETIME = int(
+    os.getenv("TRANSACTION_TOKEN_CACHE_MIN_LIFETIME", 120)
+)
+USER_TOKEN_REVOCATION_FILTER_ENABLED = bool(
+    int(os.getenv("USER_TOKEN_REVOCATION_FILTER_ENABLED", 0))
+)
+USER_TOKEN_REVOCATION_FILTER_RELOAD_INTERVAL = float(
+    os.getenv("USER_TOKEN_REVOCATION_FILTER_RELOAD_INTERVAL", 300)
+)
+USER_TOKEN_REVOCATION_FILTER_FALSE_POSITIVE_RATE = float(
+    os.getenv("USER_TOKEN_REVOCATION_FILTER_FALSE_POSITIVE_RATE", 0.001)
+)
+ACCESS_SCOPE_CATALOG_MAX_AGE = int(os.getenv("ACCESS_SCOPE_CATALOG_MAX_AGE", 60))
 
 
 # Messaging
@@ -265,6 +324,12 @@ SENDER_EMAIL_INTEGRATION_SMTP_SENDER_NAME = os.getenv(
 SENDER_EMAIL_INTEGRATION_SMTP_SENDER_EMAIL = os.getenv(
     "SENDER_EMAIL_INTEGRATION_SMTP_SENDER_EMAIL", None
 )
+SENDER_EMAIL_INTEGRATION_SMTP_POOL_SIZE = int(
+    os.getenv("SENDER_EMAIL_INTEGRATION_SMTP_POOL_SIZE", 4)
+)
+SENDER_EMAIL_INTEGRATION_SMTP_POOL_MAX_IDLE = int(
+    os.getenv("SENDER_EMAIL_INTEGRATION_SMTP_POOL_MAX_IDLE", 60)
+)
 
 SENDER_SMS_INTEGRATION = os.getenv("SENDER_SMS_INTEGRATION", None)
 SENDER_SMS_INTEGRATION_MAILJET_SENDER_NAME = os.getenv(
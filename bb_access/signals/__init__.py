@@ -1 +1 @@
-from . import user
+from . import user, role
@@ -0,0 +1,27 @@
+from django.dispatch import receiver
+from django.db.models.signals import m2m_changed, post_save, post_delete
+
+from bb_access import models
+
+
+@receiver(m2m_changed, sender=models.Role.scopes.through)
+@receiver(m2m_changed, sender=models.Role.included_roles.through)
+def role_m2m_changed_receiver(sender, action: str, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    models.RoleEffectiveScope.schedule_refresh()
+    models.AccessGeneration.bump()
+
+
+@receiver(post_delete, sender=models.Role)
+def role_post_delete_receiver(sender, instance: models.Role, **kwargs):
+    models.RoleEffectiveScope.schedule_refresh()
+    models.AccessGeneration.bump()
+
+
+@receiver(post_save, sender=models.Role)
+@receiver(post_save, sender=models.Scope)
+@receiver(post_delete, sender=models.Scope)
+def role_scope_changed_receiver(sender, **kwargs):
+    models.AccessGeneration.bump()
@@ -1,5 +1,6 @@
 from datetime import timedelta
 
+from django.conf import settings
 from django.dispatch import receiver
 from django.db.models.signals import post_save
 
@@ -20,6 +21,14 @@ def user_post_save_receiver(
         )
 
 
+@receiver(post_save, sender=models.UserToken)
+def user_token_post_save_receiver(
+    sender, instance: models.UserToken, created: bool = False, **kwargs
+):
+    if not instance.is_active:
+        models.UserToken.revoked([instance.id])
+
+
 @receiver(post_save, sender=models.UserOTP)
 def user_otp_post_save_receiver(
     sender, instance: models.UserOTP, created: bool = False, **kwargs
@@ -54,16 +63,24 @@ def user_otp_post_save_receiver(
         template = f"user_business_{language}.html"
         subject = f"Business Registration"
 
-    message = MessageSender(
-        Content(
-            subject=subject,
-            receiver=destination,
-            template=template,
-            language=language,
-            values={
-                "otp": instance,
-                "user": instance.user,
-            },
-        )
+    content = Content(
+        subject=subject,
+        receiver=destination,
+        template=template,
+        language=language,
+        values={
+            "otp": instance,
+            "user": instance.user,
+        },
     )
-    message.send()
+    if settings.OTP_DELIVERY_OUTBOX_ENABLED:
+        models.UserOTPDelivery.objects.create(
+            otp=instance,
+            medium=MessageSender.MEDIUM,
+            subject=content.subject,
+            receiver=content.receiver,
+            body=content.body,
+        )
+
+    else:
+        MessageSender(content).send()
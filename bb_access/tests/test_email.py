@@ -0,0 +1,131 @@
+import socketserver
+import threading
+from typing import List
+
+from django.test import SimpleTestCase, override_settings
+
+from bb_access.media_sender import Content
+from bb_access.media_sender.email import SMTPEmailSender, get_connection_pool
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server: SMTPStubServer = self.server
+        server.connections += 1
+        self.reply("220 stub ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250 stub")
+
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+
+                if server.rejections:
+                    server.rejections -= 1
+                    self.reply("451 try again")
+
+                else:
+                    server.messages += 1
+                    self.reply("250 OK")
+
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.connections = 0
+        self.messages = 0
+        self.rejections = 0
+
+
+class SMTPEmailSenderTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = SMTPStubServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.settings = override_settings(
+            SENDER_EMAIL_INTEGRATION_SMTP_HOST="127.0.0.1",
+            SENDER_EMAIL_INTEGRATION_SMTP_PORT=self.server.server_address[1],
+            SENDER_EMAIL_INTEGRATION_SMTP_USE_SSL=False,
+            SENDER_EMAIL_INTEGRATION_SMTP_USE_STARTTLS=False,
+            SENDER_EMAIL_INTEGRATION_SMTP_USER=None,
+            SENDER_EMAIL_INTEGRATION_SMTP_SENDER_NAME="Access",
+            SENDER_EMAIL_INTEGRATION_SMTP_SENDER_EMAIL="access@example.org",
+            SENDER_EMAIL_INTEGRATION_SMTP_POOL_SIZE=4,
+            SENDER_EMAIL_INTEGRATION_SMTP_POOL_MAX_IDLE=60,
+        )
+        self.settings.enable()
+        get_connection_pool.cache_clear()
+
+    def tearDown(self):
+        get_connection_pool().close()
+        get_connection_pool.cache_clear()
+        self.settings.disable()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_contents(self, count: int) -> List[Content]:
+        return [
+            Content(
+                subject=f"Subject {i}",
+                receiver=f"user{i}@example.org",
+                template="",
+                language="",
+                values={},
+                rendered="<p>PIN</p>",
+            )
+            for i in range(count)
+        ]
+
+    def test_send_reuses_session(self):
+        for content in self.get_contents(5):
+            SMTPEmailSender(content).send()
+
+        self.assertEqual(self.server.messages, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_send_batch_uses_one_session(self):
+        errors = SMTPEmailSender.send_batch(self.get_contents(20))
+
+        self.assertEqual(errors, [None] * 20)
+        self.assertEqual(self.server.messages, 20)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_send_batch_keeps_session_after_rejection(self):
+        self.server.rejections = 1
+        errors = SMTPEmailSender.send_batch(self.get_contents(3))
+
+        self.assertIsNotNone(errors[0])
+        self.assertEqual(errors[1:], [None, None])
+        self.assertEqual(self.server.messages, 2)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_send_without_pool(self):
+        get_connection_pool.cache_clear()
+        with override_settings(SENDER_EMAIL_INTEGRATION_SMTP_POOL_SIZE=0):
+            for content in self.get_contents(3):
+                SMTPEmailSender(content).send()
+
+        self.assertEqual(self.server.messages, 3)
+        self.assertEqual(self.server.connections, 3)
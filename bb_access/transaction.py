@@ -0,0 +1,28 @@
+from typing import Callable, Optional
+
+from django.db import transaction
+
+
+def on_commit_once(key: str, func: Callable[[], None], using: Optional[str] = None):
+    """
+    Call `func` once the current transaction is committed, at most once per
+    transaction and `key`. Outside of a transaction it is called right away.
+    The pending callbacks of the connection serve as the registry, so a call
+    rolled back with its transaction or savepoint can be registered again.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        func()
+        return
+
+    if any(
+        getattr(pending[1], "on_commit_key", None) == key
+        for pending in connection.run_on_commit
+    ):
+        return
+
+    def call():
+        func()
+
+    call.on_commit_key = key
+    transaction.on_commit(call, using=using)
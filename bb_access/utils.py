@@ -1,10 +1,165 @@
+import hashlib
+from typing import Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from djdantic.schemas import Access, AccessToken
+from djfapi.exceptions import AuthError
 from djfapi.security.jwt import JWTToken as BaseJWTToken
+from jose import jws, jwt
+from jose.exceptions import JWTClaimsError, JWTError
+from jose.utils import base64url_decode
+from sentry_tools import set_extra
+
+from bb_access.auth.bitset import decode_bits, iter_indexes
+from bb_access.auth.cache import ExpiringLRUCache
+from bb_access.auth.graph import get_cached_graph, get_graph, invalidate
+from bb_access.auth.keys import VerificationKey, get_verification_keys
+from bb_access.metrics import Counter
+
+
+verified_claims_cache = ExpiringLRUCache(
+    settings.JWT_CLAIMS_CACHE_SIZE,
+    Counter(
+        "access_jwt_claims_cache_requests_total",
+        "Lookups of verified token claims by result",
+    ),
+)
+
+
+def get_scope_codes(generation: int) -> Dict[int, str]:
+    """
+    Get the codes of all active scopes by `Scope.index` from a scope catalog of
+    at least the given generation.
+    """
+    graph = get_graph()
+    if graph.generation < generation:
+        invalidate(generation)
+        graph = get_graph()
+
+    return graph.codes
+
+
+def get_cached_scope_codes(generation: int) -> Optional[Dict[int, str]]:
+    """
+    Like `get_scope_codes`, but `None` if the scope catalog has to be loaded
+    from the database first.
+    """
+    graph = get_cached_graph()
+    if graph and graph.generation >= generation:
+        return graph.codes
+
+    return None
 
 
 class JWTToken(BaseJWTToken):
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        *,
+        scope_codes: Callable[[int], Dict[int, str]] = get_scope_codes,
+        cached_scope_codes: Optional[
+            Callable[[int], Optional[Dict[int, str]]]
+        ] = get_cached_scope_codes,
+        verification_keys: Callable[
+            [], Dict[str, VerificationKey]
+        ] = get_verification_keys,
+        claims_cache: Optional[ExpiringLRUCache] = verified_claims_cache,
+        **kwargs,
+    ):
         kwargs.setdefault("issuer", settings.JWT_ISSUER)
-        kwargs.setdefault("key", settings.JWT_PUBLIC_KEY)
-        kwargs.setdefault("algorithm", "ES512")
         super().__init__(**kwargs)
+        self.scope_codes = scope_codes
+        self.cached_scope_codes = cached_scope_codes
+        self.verification_keys = verification_keys
+        self.claims_cache = claims_cache
+
+    def _verify_signature(self, token: str):
+        """
+        Verify the signature with the key of the token's `kid`. Tokens issued
+        before key ids were introduced are checked against all keys.
+        """
+        header = jws.get_unverified_header(token)
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            signature = base64url_decode(signature)
+
+        except ValueError as error:
+            raise JWTError("Invalid token") from error
+
+        keys = self.verification_keys()
+        if "kid" in header:
+            candidates = [keys[header["kid"]]] if header["kid"] in keys else []
+
+        else:
+            candidates = keys.values()
+
+        if not any(
+            key.algorithm == header.get("alg") and key.verify(signing_input, signature)
+            for key in candidates
+        ):
+            raise JWTError("Signature verification failed.")
+
+    def _decode_verified(self, token: str) -> dict:
+        """
+        Claims of a token with verified signature. Claims of tokens with an `exp`
+        are cached by token digest until they expire, so repeated requests with
+        the same token are verified once.
+        """
+        cache_key = None
+        if self.claims_cache:
+            cache_key = (hashlib.sha256(token.encode()).digest(), self.issuer)
+            claims = self.claims_cache.get(cache_key)
+            if claims is not None:
+                return dict(claims)
+
+        self._verify_signature(token)
+        claims = jwt.decode(
+            token,
+            key=None,
+            issuer=self.issuer,
+            options={"verify_signature": False, "verify_aud": False},
+        )
+        if cache_key and isinstance(claims.get("exp"), (int, float)):
+            self.claims_cache.set(cache_key, claims, claims["exp"])
+
+        return dict(claims)
+
+    def _expand_scope_bits(self, claims: dict, codes: Dict[int, str]) -> dict:
+        claims["aud"] = [
+            codes[index]
+            for index in iter_indexes(decode_bits(claims["sbs"]))
+            if index in codes
+        ]
+        return claims
+
+    def decode_token(self, token, audience=None):
+        claims = self._decode_verified(token)
+        if "sbs" in claims:
+            self._expand_scope_bits(claims, self.scope_codes(claims["scv"]))
+
+        if audience and audience not in claims.get("aud", []):
+            raise JWTClaimsError("Invalid audience")
+
+        return claims
+
+    async def _create_access(self, token: str):
+        """
+        Like `decode_token`, but the scope catalog needed to expand `sbs` is only
+        taken from memory within the event loop. Loading it from the database
+        happens in a worker thread.
+        """
+        if not token:
+            raise AuthError
+
+        claims = self._decode_verified(token.removeprefix("Bearer").strip())
+        if "sbs" in claims:
+            codes = self.cached_scope_codes and self.cached_scope_codes(claims["scv"])
+            if codes is None:
+                codes = await sync_to_async(self.scope_codes)(claims["scv"])
+
+            self._expand_scope_bits(claims, codes)
+
+        access = Access(token=AccessToken(**claims))
+        set_extra("access.token.aud", access.token.aud)
+
+        return access